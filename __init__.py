@@ -1,5 +1,4 @@
 import os
-import importlib.util
 import sys
 from pathlib import Path
 
@@ -7,37 +6,83 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 nodes_dir = current_dir / "nodes"
 
+# 让节点文件可以通过绝对导入使用共享工具包 goohai_utils
+if str(current_dir) not in sys.path:
+    sys.path.append(str(current_dir))
+
+from goohai_utils.node_manifest import load_manifest
+from goohai_utils.lazy_nodes import load_node_module, make_lazy_node, add_resolve_hook
+from goohai_utils.import_profiler import ImportProfiler
+from goohai_utils.node_metrics import instrument_node_class
+
+# 导入分析开关：GOOHAI_PROFILE_IMPORTS=1 输出到包目录，也可直接指定报告的json路径
+PROFILE_IMPORTS = os.environ.get("GOOHAI_PROFILE_IMPORTS", "").strip()
+profiler = ImportProfiler() if PROFILE_IMPORTS and PROFILE_IMPORTS != "0" else None
+
+# 懒加载开关：设置环境变量 GOOHAI_LAZY_NODES=0 可恢复启动时导入全部节点模块
+# 开启导入分析时需要逐个导入，懒加载自动关闭
+LAZY_NODES = os.environ.get("GOOHAI_LAZY_NODES", "1") != "0" and profiler is None
+
+# 节点执行指标开关：GOOHAI_NODE_METRICS=1 时记录每个节点的耗时、内存和张量规模
+NODE_METRICS = os.environ.get("GOOHAI_NODE_METRICS", "0") == "1"
+if NODE_METRICS:
+    add_resolve_hook(instrument_node_class)
+
 # 初始化全局映射字典
 NODE_CLASS_MAPPINGS = {}
 NODE_DISPLAY_NAME_MAPPINGS = {}
 
+# 读取节点清单（按文件修改时间增量刷新），懒加载模式下据此注册节点而不导入模块
+manifest = load_manifest(nodes_dir, current_dir / ".goohai_manifest.json") if LAZY_NODES else {}
+
 # 遍历nodes目录中的所有Python文件
 for file_path in nodes_dir.glob("*.py"):
     # 跳过__init__.py文件
     if file_path.name == "__init__.py":
         continue
-        
+
     # 提取模块名（不含.py后缀）
     module_name = file_path.stem
-    
-    # 使用importlib动态加载模块
-    spec = importlib.util.spec_from_file_location(f"goohaitools.nodes.{module_name}", file_path)
-    module = importlib.util.module_from_spec(spec)
-    
+
+    # 映射可静态确定的模块只注册代理类，首次使用节点时才真正导入
+    entry = manifest.get(file_path.name)
+    if entry and not entry["eager"]:
+        for node_name, class_name in entry["class_mappings"].items():
+            NODE_CLASS_MAPPINGS[node_name] = make_lazy_node(
+                file_path, class_name, entry["classes"][class_name], node_name
+            )
+        NODE_DISPLAY_NAME_MAPPINGS.update(entry["display_mappings"])
+        continue
+
     try:
-        # 执行模块代码
-        spec.loader.exec_module(module)
-        
+        # 使用importlib动态加载并执行模块代码
+        if profiler is not None:
+            module = profiler.profile(module_name, load_node_module, file_path)
+        else:
+            module = load_node_module(file_path)
+
         # 检查并合并NODE_CLASS_MAPPINGS
         if hasattr(module, 'NODE_CLASS_MAPPINGS'):
             NODE_CLASS_MAPPINGS.update(module.NODE_CLASS_MAPPINGS)
-            
+            if NODE_METRICS:
+                for node_name, node_cls in module.NODE_CLASS_MAPPINGS.items():
+                    instrument_node_class(node_name, node_cls)
+
         # 检查并合并NODE_DISPLAY_NAME_MAPPINGS
         if hasattr(module, 'NODE_DISPLAY_NAME_MAPPINGS'):
             NODE_DISPLAY_NAME_MAPPINGS.update(module.NODE_DISPLAY_NAME_MAPPINGS)
-            
+
     except Exception as e:
         print(f"Error loading node module {module_name}: {str(e)}")
         continue
 
-__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
\ No newline at end of file
+if profiler is not None:
+    report_path = PROFILE_IMPORTS if PROFILE_IMPORTS.lower().endswith(".json") else str(current_dir / "goohai_import_profile.json")
+    try:
+        profiler.write_report(report_path)
+        print(f"【孤海工具箱】节点导入分析报告已保存: {report_path}")
+    except OSError as e:
+        print(f"【孤海工具箱】节点导入分析报告保存失败: {str(e)}")
+    print(profiler.summary_table())
+
+__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
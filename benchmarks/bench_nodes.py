@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+孤海工具箱离线基准测试
+
+无需启动 ComfyUI：用桩模块替代 comfy / folder_paths / nodes，逐个导入 nodes/ 下的节点并计时。
+每次运行结果保存为 JSON，并与同一模式下的上一次结果比较，超过阈值的用例标记为性能回退。
+
+用法:
+    python benchmarks/bench_nodes.py               # 完整模式：4K/8K 图像、1万张图片的文件夹
+    python benchmarks/bench_nodes.py --quick       # 快速模式：小尺寸输入，用于本地冒烟
+    python benchmarks/bench_nodes.py --filter 排版 --repeat 5 --fail-on-regression
+"""
+import argparse
+import glob
+import json
+import platform
+import statistics
+import sys
+import time
+import traceback
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.append(str(ROOT_DIR))
+
+from comfy_stubs import install_stubs
+
+# 各模式下的合成输入规模
+PROFILES = {
+    "full": {
+        "images": {"4k_rgb": (2160, 3840, 3), "4k_rgba": (2160, 3840, 4), "8k_rgb": (4320, 7680, 3)},
+        "folder_files": 10000,
+        "layout_files": 200,
+    },
+    "quick": {
+        "images": {"512_rgb": (512, 512, 3), "512_rgba": (512, 512, 4)},
+        "folder_files": 300,
+        "layout_files": 24,
+    },
+}
+
+
+# ================ 合成输入 ================
+def make_image(shape, seed=0):
+    import torch
+    g = torch.Generator().manual_seed(seed)
+    h, w, c = shape
+    image = torch.rand((1, h, w, c), generator=g)
+    if c == 4:
+        # 中间不透明、四周透明，接近抠图结果
+        image[..., 3] = 0.0
+        image[:, h // 8: h - h // 8, w // 8: w - w // 8, 3] = 1.0
+    return image
+
+
+def make_mask(shape):
+    import torch
+    h, w = shape[:2]
+    mask = torch.zeros((1, h, w))
+    mask[:, h // 6: h - h // 6, w // 4: w - w // 4] = 1.0
+    return mask
+
+
+def make_folder(fixture_dir, count):
+    """生成（或复用）包含 count 张小尺寸 JPEG 的文件夹"""
+    from PIL import Image
+    folder = fixture_dir / f"images_{count}"
+    marker = folder / ".complete"
+    if marker.exists():
+        return str(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        color = ((i * 37) % 256, (i * 71) % 256, (i * 113) % 256)
+        Image.new("RGB", (160, 200), color).save(folder / f"img_{i:05d}.jpg", quality=80)
+    marker.touch()
+    return str(folder)
+
+
+_输出用途 = ("输出", "保存", "导出", "存储", "output", "save", "export")
+_路径字样 = ("文件夹", "路径", "目录", "folder", "path", "dir")
+
+
+def is_output_path(name, default):
+    """保存/输出类的路径参数（如 保存路径、保存目录、输出文件夹路径），或默认值为相对输出目录的字符串参数；
+    这些参数都指向临时输出目录，压测不会往工作区写文件"""
+    lowered = name.lower()
+    if any(word in lowered for word in _输出用途) and any(word in lowered for word in _路径字样):
+        return True
+    default = str(default or "").replace("\\", "/").lower()
+    return default == "output" or default.startswith("output/")
+
+
+def default_value(name, spec, ctx):
+    """按 INPUT_TYPES 声明生成参数；无法合成的类型返回 KeyError"""
+    kind = spec[0]
+    opts = spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {}
+    if isinstance(kind, (list, tuple)):
+        return opts.get("default", kind[0] if kind else "")
+    if kind == "IMAGE":
+        return ctx["image"]
+    if kind == "MASK":
+        return ctx["mask"]
+    if kind in ("INT", "FLOAT"):
+        return opts.get("default", opts.get("min", 0))
+    if kind == "BOOLEAN":
+        return opts.get("default", False)
+    if kind == "COLOR":
+        return opts.get("default", "#FFFFFF")
+    if kind == "STRING":
+        lowered = name.lower()
+        if is_output_path(name, opts.get("default", "")):
+            return ctx["output_dir"]
+        if "folder" in opts or "folder_media" in opts or "folder" in lowered or "文件夹" in name or "目录" in name:
+            return ctx["small_folder"]
+        return opts.get("default", "")
+    raise KeyError(kind)
+
+
+def build_kwargs(node_cls, ctx, overrides=None):
+    spec = node_cls.INPUT_TYPES()
+    kwargs = {}
+    for name, item in spec.get("required", {}).items():
+        kwargs[name] = default_value(name, item, ctx)
+    kwargs.update(overrides or {})
+    return kwargs
+
+
+# 需要专门输入的用例：{节点键: [(用例名, 参数覆盖函数)]}
+def special_cases(profile, ctx):
+    big_folder = ctx["big_folder"]
+    layout_folder = ctx["layout_folder"]
+    return {
+        "GH_BatchLayout": [
+            (f"scan_{profile['folder_files']}_one_page", {"输入文件夹路径": big_folder, "开启批处理": False}),
+            (f"render_{profile['layout_files']}_all_pages", {"输入文件夹路径": layout_folder, "开启批处理": True}),
+        ],
+        "GuHai_ImageLoaderPro": [
+            (f"single_{profile['folder_files']}", {"文件夹路径": big_folder, "加载模式": "单张模式"}),
+            (f"incremental_{profile['folder_files']}", {"文件夹路径": big_folder, "加载模式": "递增模式"}),
+        ],
+        "LoneSeaImageCounter": [
+            (f"count_{profile['folder_files']}", {"folder_path": big_folder}),
+        ],
+    }
+
+
+# ================ 运行 ================
+def load_nodes(filter_text):
+    from goohai_utils.lazy_nodes import load_node_module
+    nodes, import_times, import_errors = {}, {}, {}
+    for file_path in sorted((ROOT_DIR / "nodes").glob("*.py")):
+        start = time.perf_counter()
+        try:
+            module = load_node_module(file_path)
+        except Exception as e:
+            import_errors[file_path.stem] = f"{type(e).__name__}: {e}"
+            continue
+        import_times[file_path.stem] = round(time.perf_counter() - start, 4)
+        for key, cls in getattr(module, "NODE_CLASS_MAPPINGS", {}).items():
+            display = getattr(module, "NODE_DISPLAY_NAME_MAPPINGS", {}).get(key, key)
+            if filter_text and filter_text not in key and filter_text not in display and filter_text not in file_path.stem:
+                continue
+            nodes[key] = cls
+    return nodes, import_times, import_errors
+
+
+def time_case(node_cls, kwargs, repeat):
+    times = []
+    for _ in range(repeat):
+        node = node_cls()
+        func = getattr(node, node_cls.FUNCTION)
+        start = time.perf_counter()
+        func(**kwargs)
+        times.append(time.perf_counter() - start)
+    return {
+        "median": round(statistics.median(times), 5),
+        "min": round(min(times), 5),
+        "runs": len(times),
+    }
+
+
+def run(args):
+    profile = PROFILES["quick" if args.quick else "full"]
+    fixture_dir = Path(args.fixture_dir)
+    dirs = install_stubs(str(fixture_dir / "comfy"))
+
+    print("准备测试数据 ...")
+    ctx = {
+        "output_dir": dirs["output"],
+        "small_folder": make_folder(fixture_dir, 20),
+        "big_folder": make_folder(fixture_dir, profile["folder_files"]),
+        "layout_folder": make_folder(fixture_dir, profile["layout_files"]),
+    }
+
+    nodes, import_times, import_errors = load_nodes(args.filter)
+    cases = special_cases(profile, ctx)
+    results = {}
+
+    for key, node_cls in nodes.items():
+        if key in cases:
+            planned = [(name, None, overrides) for name, overrides in cases[key]]
+        else:
+            planned = [(name, shape, {}) for name, shape in profile["images"].items()]
+
+        for case_name, shape, overrides in planned:
+            case_id = f"{key}/{case_name}"
+            if shape is not None:
+                ctx["image"] = make_image(shape)
+                ctx["mask"] = make_mask(shape)
+            else:
+                first_shape = next(iter(profile["images"].values()))
+                ctx["image"] = make_image(first_shape)
+                ctx["mask"] = make_mask(first_shape)
+            try:
+                kwargs = build_kwargs(node_cls, ctx, overrides)
+            except KeyError as e:
+                results[case_id] = {"status": "skipped", "reason": f"无法合成输入类型 {e}"}
+                continue
+            try:
+                results[case_id] = {"status": "ok", **time_case(node_cls, kwargs, args.repeat)}
+            except Exception as e:
+                results[case_id] = {
+                    "status": "error",
+                    "error": f"{type(e).__name__}: {e}",
+                    "traceback": traceback.format_exc(limit=3) if args.verbose else None,
+                }
+            status = results[case_id]["status"]
+            shown = f"{results[case_id]['median']:.4f}s" if status == "ok" else status
+            print(f"  {case_id:<60} {shown}")
+
+    return {
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "mode": "quick" if args.quick else "full",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "import_seconds": import_times,
+        "import_errors": import_errors,
+        "results": results,
+    }
+
+
+# ================ 基线比较 ================
+def previous_report(results_dir, mode):
+    files = sorted(glob.glob(str(results_dir / f"bench_{mode}_*.json")))
+    if not files:
+        return None
+    with open(files[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(current, previous, threshold, min_delta):
+    regressions, improvements = [], []
+    if previous is None:
+        return regressions, improvements
+    for case_id, cur in current["results"].items():
+        prev = previous["results"].get(case_id)
+        if not prev or cur.get("status") != "ok" or prev.get("status") != "ok":
+            continue
+        delta = cur["median"] - prev["median"]
+        ratio = cur["median"] / prev["median"] if prev["median"] > 0 else float("inf")
+        entry = (case_id, prev["median"], cur["median"], ratio)
+        if delta > min_delta and ratio > 1 + threshold:
+            regressions.append(entry)
+        elif -delta > min_delta and ratio < 1 - threshold:
+            improvements.append(entry)
+    return regressions, improvements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="孤海工具箱离线基准测试")
+    parser.add_argument("--quick", action="store_true", help="使用小尺寸输入快速运行")
+    parser.add_argument("--filter", default="", help="只测试节点键、显示名或文件名包含该文本的节点")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数，取中位数")
+    parser.add_argument("--threshold", type=float, default=0.2, help="中位数变慢超过该比例视为回退")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="忽略小于该秒数的差异")
+    parser.add_argument("--results-dir", default=str(BENCH_DIR / "results"))
+    parser.add_argument("--fixture-dir", default=str(BENCH_DIR / ".fixtures"))
+    parser.add_argument("--fail-on-regression", action="store_true", help="发现回退时以非零状态退出")
+    parser.add_argument("--verbose", action="store_true", help="报告中保留异常堆栈")
+    args = parser.parse_args()
+
+    report = run(args)
+    results_dir = Path(args.results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    previous = previous_report(results_dir, report["mode"])
+    regressions, improvements = compare(report, previous, args.threshold, args.min_delta)
+    report["baseline"] = previous["generated_at"] if previous else None
+    report["regressions"] = [c[0] for c in regressions]
+
+    out_path = results_dir / f"bench_{report['mode']}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    counts = {}
+    for r in report["results"].values():
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(f"\n结果已保存: {out_path}")
+    print(f"用例统计: {counts}，导入失败模块 {len(report['import_errors'])} 个")
+    if previous is None:
+        print("未找到上一次结果，本次作为基线。")
+    for title, items in (("性能回退", regressions), ("性能提升", improvements)):
+        if items:
+            print(f"\n{title}（对比 {previous['generated_at']}）:")
+            for case_id, old, new, ratio in items:
+                print(f"  {case_id:<60} {old:.4f}s -> {new:.4f}s  ({ratio:.2f}x)")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# ComfyUI 运行环境桩：只提供节点文件实际用到的接口，使节点可以脱离 ComfyUI 服务导入和计时
+import os
+import sys
+import tempfile
+import types
+
+MAX_RESOLUTION = 16384
+
+
+class _ProgressBar:
+    def __init__(self, total):
+        self.total = total
+        self.current = 0
+
+    def update(self, value):
+        self.current += value
+
+    def update_absolute(self, value, total=None, preview=None):
+        self.current = value
+
+
+class _SaveImage:
+    def __init__(self):
+        self.output_dir = _dirs["output"]
+        self.type = "output"
+        self.prefix_append = ""
+        self.compress_level = 4
+
+    def save_images(self, images, filename_prefix="ComfyUI", prompt=None, extra_pnginfo=None):
+        return {"ui": {"images": []}}
+
+
+class _PreviewImage(_SaveImage):
+    def __init__(self):
+        super().__init__()
+        self.output_dir = _dirs["temp"]
+        self.type = "temp"
+
+
+_dirs = {}
+
+
+def install_stubs(base_dir=None):
+    """向 sys.modules 注册 comfy / folder_paths / nodes 桩模块；已存在真实模块时不覆盖"""
+    base_dir = base_dir or tempfile.mkdtemp(prefix="goohai_bench_")
+    for name in ("output", "temp", "input"):
+        _dirs[name] = os.path.join(base_dir, name)
+        os.makedirs(_dirs[name], exist_ok=True)
+
+    if "comfy" not in sys.modules:
+        import torch
+
+        comfy = types.ModuleType("comfy")
+        utils = types.ModuleType("comfy.utils")
+        utils.ProgressBar = _ProgressBar
+        utils.PROGRESS_BAR_ENABLED = False
+        model_management = types.ModuleType("comfy.model_management")
+        model_management.get_torch_device = lambda: torch.device("cpu")
+        model_management.intermediate_device = lambda: torch.device("cpu")
+        sd = types.ModuleType("comfy.sd")
+        sd.__all__ = []
+        comfy.utils, comfy.model_management, comfy.sd = utils, model_management, sd
+        sys.modules.update({
+            "comfy": comfy,
+            "comfy.utils": utils,
+            "comfy.model_management": model_management,
+            "comfy.sd": sd,
+        })
+
+    if "folder_paths" not in sys.modules:
+        folder_paths = types.ModuleType("folder_paths")
+        folder_paths.get_output_directory = lambda: _dirs["output"]
+        folder_paths.get_temp_directory = lambda: _dirs["temp"]
+        folder_paths.get_input_directory = lambda: _dirs["input"]
+        folder_paths.get_filename_list = lambda folder_name: []
+        folder_paths.get_full_path = lambda folder_name, filename: None
+        folder_paths.get_annotated_filepath = lambda name: os.path.join(_dirs["input"], name)
+
+        def get_save_image_path(filename_prefix, output_dir, image_width=0, image_height=0):
+            subfolder = os.path.dirname(os.path.normpath(filename_prefix))
+            filename = os.path.basename(os.path.normpath(filename_prefix))
+            full_output_folder = os.path.join(output_dir, subfolder)
+            os.makedirs(full_output_folder, exist_ok=True)
+            return full_output_folder, filename, 1, subfolder, filename_prefix
+
+        folder_paths.get_save_image_path = get_save_image_path
+        sys.modules["folder_paths"] = folder_paths
+
+    if "nodes" not in sys.modules:
+        nodes = types.ModuleType("nodes")
+        nodes.MAX_RESOLUTION = MAX_RESOLUTION
+        nodes.SaveImage = _SaveImage
+        nodes.PreviewImage = _PreviewImage
+        nodes.NODE_CLASS_MAPPINGS = {}
+        sys.modules["nodes"] = nodes
+
+    return dict(_dirs)
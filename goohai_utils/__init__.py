@@ -0,0 +1,2 @@
+# 孤海工具箱共享工具包
+# 节点文件通过 `from goohai_utils.xxx import ...` 使用，包根目录由顶层 __init__.py 加入 sys.path
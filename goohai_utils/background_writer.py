@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# 后台写出线程：编码和写盘与主流程的合成重叠进行（PIL 编码 JPEG/PNG 时会释放 GIL）
+#
+# submit 把任务放入有界队列，队列满时阻塞，待写数据占用的内存因此有上限；
+# 单个任务出错不会中断后续写出，close 等待全部写完后返回错误列表供节点汇报
+import queue
+import threading
+
+
+class BackgroundWriter:
+    def __init__(self, write_func, max_pending=2, name="goohai-writer"):
+        self._write = write_func
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._errors = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            label, args = job
+            try:
+                self._write(*args)
+            except Exception as e:
+                self._errors.append((label, e))
+
+    def submit(self, label, *args):
+        """排队写出 write_func(*args)，label 用于错误报告"""
+        if self._closed:
+            raise RuntimeError("写出线程已关闭")
+        self._queue.put((label, args))
+
+    def close(self):
+        """等待队列中的任务全部写完，返回 [(label, 异常)]"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        return list(self._errors)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# 批次执行：让原本只处理 image[0] 的节点逐张处理整个批次，并把结果沿批次维拼回
+#
+# 用法：节点把单张处理逻辑写成 func(i)，内部用 batch_item 取第 i 张输入
+#   results = map_batch(func, batch_count(image, mask))
+#   image_out, mask_out, flags = stack_outputs(results)
+# - 输入批次数不同时按 ComfyUI 习惯广播：批次为 1 的输入对每一张都复用
+# - 单张处理提交到共享线程池（见 worker_pool）并行执行
+# - 输出尺寸不一致时按第一张的尺寸缩放后再拼接（与 ComfyUI 的 Image Batch 节点一致）
+import torch
+import torch.nn.functional as F
+
+from .worker_pool import map_ordered
+
+
+def batch_count(*tensors):
+    """多个输入中最大的批次数，None 会被忽略"""
+    return max((len(t) for t in tensors if t is not None), default=0)
+
+
+def batch_item(tensor, index):
+    """取第 index 张并保留批次维（[1,...]），批次不足时循环复用，None 原样返回"""
+    if tensor is None:
+        return None
+    index %= len(tensor)
+    return tensor[index:index + 1]
+
+
+def map_batch(func, count, parallel=True):
+    """对 0..count-1 调用 func，结果按下标顺序返回；任一张出错时抛出该异常"""
+    if not parallel:
+        return [func(i) for i in range(count)]
+    return map_ordered(func, range(count))
+
+
+def _match(tensor, height, width, channels):
+    if tensor.dim() == 4 and tensor.shape[-1] < channels:
+        # RGB 与 RGBA 混合时补不透明的 alpha
+        pad = torch.ones((*tensor.shape[:-1], channels - tensor.shape[-1]), dtype=tensor.dtype)
+        tensor = torch.cat([tensor, pad], dim=-1)
+    if tuple(tensor.shape[1:3]) == (height, width):
+        return tensor
+    if tensor.dim() == 4:
+        resized = F.interpolate(tensor.movedim(-1, 1), size=(height, width), mode="bilinear", align_corners=False)
+        return resized.movedim(1, -1)
+    return F.interpolate(tensor.unsqueeze(1), size=(height, width), mode="bilinear", align_corners=False).squeeze(1)
+
+
+def stack_tensors(tensors):
+    """沿批次维拼接，尺寸以第一张为准；单张时直接返回"""
+    if len(tensors) == 1:
+        return tensors[0]
+    height, width = tensors[0].shape[1:3]
+    channels = max(t.shape[-1] for t in tensors) if tensors[0].dim() == 4 else None
+    return torch.cat([_match(t, height, width, channels) for t in tensors], dim=0)
+
+
+def stack_outputs(results):
+    """把逐张返回的元组按位置合并：张量沿批次维拼接，其他类型返回按批次顺序排列的列表"""
+    merged = []
+    for values in zip(*results):
+        if all(isinstance(v, torch.Tensor) for v in values):
+            merged.append(stack_tensors(list(values)))
+        else:
+            merged.append(list(values))
+    return tuple(merged)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# 单元格缓存：排版时处理好的单元格图片（缩放裁剪、圆角、描边之后）按内容键缓存
+#
+# 同一批照片只改画布尺寸、间距或文件名显示重新排版时，单元格不必重新解码和处理。
+# - 内存：按字节数限制的 LRU，环境变量 GOOHAI_CELL_CACHE_MB 指定上限（默认 256）
+# - 磁盘（可选）：PNG 文件保存在 GOOHAI_CELL_CACHE_DIR（默认 ~/.cache/goohai/cells），重启后仍可使用
+# 键中包含源文件的大小和 mtime，源文件修改后自然失效；缓存的图片由多个线程共享，只能读取不能修改
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+MAX_BYTES = max(0, int(os.environ.get("GOOHAI_CELL_CACHE_MB", "256"))) * 1024 * 1024
+DISK_DIR = os.environ.get(
+    "GOOHAI_CELL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "goohai", "cells")
+)
+
+_锁 = threading.Lock()
+_缓存 = OrderedDict()
+_已用字节 = 0
+
+
+def cell_key(path, *options):
+    """源文件 + 处理参数的缓存键；文件无法访问时返回 None（不缓存）"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns) + tuple(options)
+
+
+def _image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+def _disk_path(key):
+    digest = hashlib.sha1(repr(key).encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(DISK_DIR, digest[:2], digest + ".png")
+
+
+def get_cell(key, use_disk=False):
+    """返回缓存的单元格图片，没有时返回 None"""
+    if key is None:
+        return None
+    with _锁:
+        image = _缓存.get(key)
+        if image is not None:
+            _缓存.move_to_end(key)
+            return image
+    if not use_disk:
+        return None
+    try:
+        with Image.open(_disk_path(key)) as f:
+            image = f.copy()
+    except (OSError, ValueError):
+        return None
+    _remember(key, image)
+    return image
+
+
+def put_cell(key, image, use_disk=False):
+    if key is None:
+        return
+    _remember(key, image)
+    if use_disk:
+        path = _disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(tmp_path, format="PNG", compress_level=1)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"【孤海工具箱】单元格缓存写入失败: {path} - {str(e)}")
+
+
+def _remember(key, image):
+    global _已用字节
+    size = _image_bytes(image)
+    if size > MAX_BYTES:
+        return
+    with _锁:
+        old = _缓存.pop(key, None)
+        if old is not None:
+            _已用字节 -= _image_bytes(old)
+        _缓存[key] = image
+        _已用字节 += size
+        while _已用字节 > MAX_BYTES and _缓存:
+            _, evicted = _缓存.popitem(last=False)
+            _已用字节 -= _image_bytes(evicted)
+
+
+def clear_cell_cache():
+    """清空内存缓存（磁盘缓存目录可直接删除）"""
+    global _已用字节
+    with _锁:
+        _缓存.clear()
+        _已用字节 = 0
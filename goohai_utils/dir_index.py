@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# 目录索引：缓存各目录排序后的文件/子目录列表和文件 stat 信息，只在目录 mtime 变化时重新读取
+#
+# 文件的增删、改名都会更新所在目录的 mtime，所以递归扫描时只需对每级目录 stat 一次，
+# 未变化的目录直接使用缓存（NAS 上十万级图片的目录不必每次执行都完整遍历）。
+# 注意：原地覆盖文件内容不会改变目录 mtime，file_stats 在这种情况下可能滞后。
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# 读取时目录 mtime 距今不足该秒数则下次仍重新读取（部分文件系统 mtime 精度只有 1~2 秒）
+_MTIME_SLACK = 2.0
+# 缓存的递归扫描结果数量上限（每个结果可能包含十万级路径）
+_TREE_CACHE_SIZE = 16
+
+_锁 = threading.Lock()
+_目录缓存 = {}
+_树缓存 = OrderedDict()
+
+
+def _listing(path):
+    """返回目录的缓存条目，目录变化时重新读取；目录无法访问时抛出 OSError"""
+    key = os.path.abspath(path)
+    mtime = os.stat(key).st_mtime_ns
+    with _锁:
+        cached = _目录缓存.get(key)
+    if cached is not None and cached["mtime"] == mtime and cached["trusted"]:
+        return cached
+
+    scan_time = time.time()
+    files, dirs, walk_dirs = [], [], []
+    with os.scandir(key) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                dirs.append(entry.name)
+                # 与 os.walk 默认行为一致：不进入指向目录的符号链接
+                if not entry.is_symlink():
+                    walk_dirs.append(entry.name)
+            else:
+                files.append(entry.name)
+    files.sort()
+    dirs.sort()
+    listing = {
+        "mtime": mtime,
+        "trusted": scan_time - mtime / 1e9 > _MTIME_SLACK,
+        "files": files,
+        "dirs": dirs,
+        "walk_dirs": sorted(walk_dirs),
+        # 名称列表的摘要：mtime 精度不足时，同一 mtime 下内容变化也能被指纹发现
+        "digest": zlib.crc32("\0".join(files + ["/"] + dirs).encode("utf-8", "surrogateescape")),
+        "stats": None,
+    }
+    with _锁:
+        _目录缓存[key] = listing
+    return listing
+
+
+def list_files(path):
+    """目录下的文件名（不含子目录），按名称排序"""
+    return list(_listing(path)["files"])
+
+
+def list_dirs(path):
+    """目录下的一级子目录名（含指向目录的符号链接），按名称排序"""
+    return list(_listing(path)["dirs"])
+
+
+def file_stats(path):
+    """目录下各文件的 {文件名: (字节数, mtime_ns)}，同一版本的目录只 stat 一次"""
+    listing = _listing(path)
+    stats = listing["stats"]
+    if stats is None:
+        stats = {}
+        for name in listing["files"]:
+            try:
+                st = os.stat(os.path.join(path, name))
+            except OSError:
+                continue
+            stats[name] = (st.st_size, st.st_mtime_ns)
+        listing["stats"] = stats
+    return dict(stats)
+
+
+def _walk(root, recursive):
+    """[(目录路径, 缓存条目)]，无法访问的目录跳过（与 os.walk 一致）"""
+    found = []
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            listing = _listing(current)
+        except OSError:
+            continue
+        found.append((current, listing))
+        if recursive:
+            stack.extend(os.path.join(current, name) for name in reversed(listing["walk_dirs"]))
+    return found
+
+
+def walk_files(root, recursive=False, exts=None):
+    """root 下的文件完整路径（按路径字符串排序），exts 为小写后缀集合，None 表示不过滤
+
+    路径由 root 与各级目录名 os.path.join 拼出，和 os.walk 的结果写法相同。
+    """
+    return list(_tree_files(root, recursive, exts, _walk(root, recursive)))
+
+
+def file_index(root, recursive=False, exts=None):
+    """与 walk_files 相同的结果，但直接返回缓存中共享的只读元组，不复制列表
+
+    目录未变化时每次调用只 stat 各级目录，按下标取文件为 O(1)，适合逐张遍历大目录的节点。
+    """
+    return _tree_files(root, recursive, exts, _walk(root, recursive))
+
+
+def _tree_files(root, recursive, exts, tree):
+    if exts is not None:
+        exts = tuple(sorted(exts))
+    listings = tuple(listing for _, listing in tree)
+    key = (root, bool(recursive), exts)
+    with _锁:
+        cached = _树缓存.get(key)
+        if cached is not None and len(cached[0]) == len(listings) and all(
+            a is b for a, b in zip(cached[0], listings)
+        ):
+            _树缓存.move_to_end(key)
+            return cached[1]
+
+    paths = tuple(sorted(
+        os.path.join(path, name)
+        for path, listing in tree
+        for name in listing["files"]
+        if exts is None or name.lower().endswith(exts)
+    ))
+    with _锁:
+        _树缓存[key] = (listings, paths)
+        _树缓存.move_to_end(key)
+        while len(_树缓存) > _TREE_CACHE_SIZE:
+            _树缓存.popitem(last=False)
+    return paths
+
+
+def tree_fingerprint(root, recursive=False, exts=None):
+    """目录树的廉价指纹：匹配文件数 + 各级目录 mtime 与名称摘要，用于节点的 IS_CHANGED
+
+    文件增删、改名都会改变指纹；路径为空或目录无法访问时返回 "missing"。
+    """
+    if not root or not os.path.isdir(root):
+        return "missing"
+    tree = _walk(root, recursive)
+    if not tree:
+        return "missing"
+    count = len(_tree_files(root, recursive, exts, tree))
+    h = hashlib.sha1()
+    for path, listing in tree:
+        h.update(f"{path}\0{listing['mtime']}\0{listing['digest']}\n".encode("utf-8", "surrogateescape"))
+    return f"{count}:{h.hexdigest()}"
+
+
+def clear_dir_index():
+    with _锁:
+        _目录缓存.clear()
+        _树缓存.clear()
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# 进程级字体缓存：所有绘制文字的节点共享，避免每次执行都从磁盘重新解析TTF
+# 另有按字体缓存的单字符宽度表和文字遮罩，批量排版中逐张测量、绘制文件名时复用
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+
+# 插件自带字体目录（与 nodes 同级的 fonts 文件夹）
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+
+# 缓存的字体对象数量上限，可通过环境变量 GOOHAI_FONT_CACHE_SIZE 调整
+FONT_CACHE_SIZE = max(1, int(os.environ.get("GOOHAI_FONT_CACHE_SIZE", "64")))
+
+_字体缓存 = OrderedDict()
+_字体锁 = threading.Lock()
+_目录缓存 = {}
+_目录锁 = threading.Lock()
+
+# 文字遮罩 / 文字宽度缓存的条目数上限，可通过环境变量 GOOHAI_TEXT_MASK_CACHE_SIZE / GOOHAI_TEXT_WIDTH_CACHE_SIZE 调整
+TEXT_MASK_CACHE_SIZE = max(0, int(os.environ.get("GOOHAI_TEXT_MASK_CACHE_SIZE", "2048")))
+TEXT_WIDTH_CACHE_SIZE = max(0, int(os.environ.get("GOOHAI_TEXT_WIDTH_CACHE_SIZE", "16384")))
+
+# {字体: {字符: 宽度}}，字体对象被释放后对应的表自动清除
+_字宽表 = weakref.WeakKeyDictionary()
+_字宽锁 = threading.Lock()
+_遮罩缓存 = OrderedDict()
+_遮罩锁 = threading.Lock()
+_宽度缓存 = OrderedDict()
+_宽度锁 = threading.Lock()
+
+
+def list_fonts(exts=(".ttf", ".otf"), font_dir=FONT_DIR):
+    """列出字体目录下的字体文件名（保持 os.listdir 顺序），仅在目录修改时间变化时重新读取磁盘"""
+    try:
+        mtime = os.stat(font_dir).st_mtime_ns
+    except OSError:
+        return []
+    with _目录锁:
+        cached = _目录缓存.get(font_dir)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, os.listdir(font_dir))
+            _目录缓存[font_dir] = cached
+    # 返回新列表，调用方可以自由插入“默认”等选项
+    return [f for f in cached[1] if f.lower().endswith(exts)]
+
+
+def resolve_font_path(font_name):
+    """字体名相对于插件 fonts 目录解析，绝对路径原样返回"""
+    if os.path.isabs(font_name):
+        return font_name
+    return os.path.join(FONT_DIR, font_name)
+
+
+def _cached(key, factory):
+    with _字体锁:
+        font = _字体缓存.get(key)
+        if font is not None:
+            _字体缓存.move_to_end(key)
+            return font
+    font = factory()
+    with _字体锁:
+        _字体缓存[key] = font
+        _字体缓存.move_to_end(key)
+        while len(_字体缓存) > FONT_CACHE_SIZE:
+            _字体缓存.popitem(last=False)
+    return font
+
+
+def get_font(font_name, size, index=0, variant=None):
+    """按（字体文件, 字号, 字体索引, 变体名）取字体，加载失败时抛出与 ImageFont.truetype 相同的异常"""
+    font_path = resolve_font_path(font_name)
+    try:
+        mtime = os.stat(font_path).st_mtime_ns
+    except OSError:
+        mtime = None
+    key = ("truetype", font_path, mtime, int(size), index, variant)
+
+    def load():
+        font = ImageFont.truetype(font_path, int(size), index=index)
+        if variant:
+            font.set_variation_by_name(variant)
+        return font
+
+    return _cached(key, load)
+
+
+def get_default_font(size=None):
+    """Pillow 内置默认字体；指定 size 时返回对应字号的可缩放版本"""
+    if size is None:
+        return _cached(("default", None), ImageFont.load_default)
+
+    def load():
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:
+            # Pillow 10.1 之前的版本 load_default 不支持 size 参数
+            return ImageFont.load_default().font_variant(size=size)
+
+    return _cached(("default", int(size)), load)
+
+
+def char_width(font, char):
+    """单个字符的宽度（与 font.getlength(char) 相同），按字体缓存"""
+    table = _字宽表.get(font)
+    if table is None:
+        with _字宽锁:
+            table = _字宽表.setdefault(font, {})
+    width = table.get(char)
+    if width is None:
+        width = font.getlength(char)
+        table[char] = width
+    return width
+
+
+def text_width(font, text):
+    """整段文字的宽度（与 font.getlength(text) 相同），同一批图片重新排版时文件名宽度不必重新测量"""
+    key = (font, text)
+    with _宽度锁:
+        width = _宽度缓存.get(key)
+        if width is not None:
+            _宽度缓存.move_to_end(key)
+            return width
+    width = font.getlength(text)
+    if TEXT_WIDTH_CACHE_SIZE > 0:
+        with _宽度锁:
+            _宽度缓存[key] = width
+            while len(_宽度缓存) > TEXT_WIDTH_CACHE_SIZE:
+                _宽度缓存.popitem(last=False)
+    return width
+
+
+def text_mask(font, text):
+    """文字的 L 模式遮罩及其相对绘制原点的偏移，返回 (遮罩, (left, top))
+
+    在整数坐标 (x, y) 处 canvas.paste(颜色, (x + left, y + top), 遮罩) 与
+    ImageDraw.text((x, y), text, fill=颜色, font=font) 的结果逐像素相同；遮罩只读，由多个线程共享
+    """
+    key = (font, text)
+    with _遮罩锁:
+        cached = _遮罩缓存.get(key)
+        if cached is not None:
+            _遮罩缓存.move_to_end(key)
+            return cached
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+    cached = (mask, (left, top))
+    if TEXT_MASK_CACHE_SIZE > 0:
+        with _遮罩锁:
+            _遮罩缓存[key] = cached
+            while len(_遮罩缓存) > TEXT_MASK_CACHE_SIZE:
+                _遮罩缓存.popitem(last=False)
+    return cached
+
+
+def clear_font_cache():
+    with _字体锁:
+        _字体缓存.clear()
+    with _目录锁:
+        _目录缓存.clear()
+    with _字宽锁:
+        _字宽表.clear()
+    with _遮罩锁:
+        _遮罩缓存.clear()
+    with _宽度锁:
+        _宽度缓存.clear()
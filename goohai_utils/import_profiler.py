@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# 启动导入分析：记录每个节点模块的导入耗时、常驻内存增长以及引入的第三方重型依赖
+import json
+import sys
+import time
+import traceback
+
+from goohai_utils.node_metrics import current_rss_bytes
+
+# 需要重点关注的重型依赖（按顶层包名匹配）
+HEAVY_PACKAGES = (
+    "torch", "torchvision", "numpy", "cv2", "dlib", "scipy", "skimage",
+    "matplotlib", "PIL", "comfy", "folder_paths",
+)
+
+
+def _top_level_modules():
+    return {name.split(".", 1)[0] for name in sys.modules}
+
+
+class ImportProfiler:
+    """包装模块导入函数并收集记录；同一依赖只计入第一个导入它的模块"""
+
+    def __init__(self):
+        self.records = []
+
+    def profile(self, module_name, load_func, *args):
+        before_modules = _top_level_modules()
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        record = {"module": module_name, "ok": True, "error": None}
+        try:
+            return load_func(*args)
+        except Exception as e:
+            record["ok"] = False
+            record["error"] = f"{type(e).__name__}: {str(e)}"
+            record["traceback"] = traceback.format_exc()
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 4)
+            rss_after = current_rss_bytes()
+            record["rss_delta_mb"] = (
+                round((rss_after - rss_before) / 1048576, 2)
+                if rss_before is not None and rss_after is not None else None
+            )
+            new_modules = sorted(_top_level_modules() - before_modules)
+            record["new_packages"] = [m for m in new_modules if not m.startswith("goohaitools")]
+            record["heavy_packages"] = [m for m in new_modules if m in HEAVY_PACKAGES]
+            self.records.append(record)
+
+    def write_report(self, report_path):
+        records = sorted(self.records, key=lambda r: r["seconds"], reverse=True)
+        report = {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "total_seconds": round(sum(r["seconds"] for r in records), 4),
+            "modules": records,
+        }
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    def summary_table(self, limit=15):
+        records = sorted(self.records, key=lambda r: r["seconds"], reverse=True)
+        lines = [
+            f"{'耗时(s)':>8}  {'内存(MB)':>9}  {'状态':<4}  模块  [重型依赖]",
+            "-" * 72,
+        ]
+        for r in records[:limit]:
+            rss = f"{r['rss_delta_mb']:.1f}" if r["rss_delta_mb"] is not None else "-"
+            heavy = f"  [{', '.join(r['heavy_packages'])}]" if r["heavy_packages"] else ""
+            status = "OK" if r["ok"] else "失败"
+            lines.append(f"{r['seconds']:>8.3f}  {rss:>9}  {status:<4}  {r['module']}{heavy}")
+        total = sum(r["seconds"] for r in records)
+        failed = sum(1 for r in records if not r["ok"])
+        lines.append("-" * 72)
+        lines.append(f"共 {len(records)} 个模块，总耗时 {total:.3f}s，失败 {failed} 个")
+        return "\n".join(lines)
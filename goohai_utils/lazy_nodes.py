@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# 节点懒加载：注册轻量代理类，首次真正使用节点时才导入其所在模块
+import ast
+import importlib.util
+import threading
+
+_模块缓存 = {}
+_导入锁 = threading.RLock()
+# 真实节点类首次导入后依次调用的钩子，签名为 hook(节点名, 节点类)
+_解析钩子 = []
+
+
+def add_resolve_hook(hook):
+    _解析钩子.append(hook)
+
+
+def load_node_module(file_path):
+    """导入单个节点文件，同一文件只执行一次"""
+    key = str(file_path)
+    with _导入锁:
+        module = _模块缓存.get(key)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(f"goohaitools.nodes.{file_path.stem}", file_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _模块缓存[key] = module
+        return module
+
+
+class _LazyNodeMeta(type):
+    """代理类的元类：清单中的字面量属性直接返回，其余属性访问和实例化转发给真实节点类"""
+
+    def _resolve(cls):
+        real = type.__getattribute__(cls, "_lazy_real")
+        if real is not None:
+            return real
+        with _导入锁:
+            real = type.__getattribute__(cls, "_lazy_real")
+            if real is None:
+                file_path = type.__getattribute__(cls, "_lazy_file")
+                try:
+                    module = load_node_module(file_path)
+                except Exception as e:
+                    print(f"Error loading node module {file_path.stem}: {str(e)}")
+                    raise
+                real = getattr(module, type.__getattribute__(cls, "_lazy_class_name"))
+                # ComfyUI 在注册时写到代理上的属性（如 RELATIVE_PYTHON_MODULE）同步给真实类
+                for name, value in type.__getattribute__(cls, "_lazy_assigned").items():
+                    setattr(real, name, value)
+                for hook in _解析钩子:
+                    hook(type.__getattribute__(cls, "_lazy_node_name"), real)
+                type.__setattr__(cls, "_lazy_real", real)
+        return real
+
+    def __getattr__(cls, name):
+        # 仅在代理自身找不到属性时调用；类体中未定义的名称直接报不存在，避免 hasattr 触发导入
+        if name.startswith("__") or name not in type.__getattribute__(cls, "_lazy_defined"):
+            raise AttributeError(name)
+        return getattr(cls._resolve(), name)
+
+    def __setattr__(cls, name, value):
+        type.__setattr__(cls, name, value)
+        if not name.startswith("_lazy_"):
+            type.__getattribute__(cls, "_lazy_assigned")[name] = value
+            real = type.__getattribute__(cls, "_lazy_real")
+            if real is not None:
+                setattr(real, name, value)
+
+    def __call__(cls, *args, **kwargs):
+        return cls._resolve()(*args, **kwargs)
+
+
+def make_lazy_node(file_path, class_name, class_info, node_name=None):
+    """根据清单条目为节点类生成代理，node_name 为注册到 NODE_CLASS_MAPPINGS 的键"""
+    namespace = {
+        name: ast.literal_eval(source) for name, source in class_info["literals"].items()
+    }
+    namespace.update({
+        "__module__": f"goohaitools.nodes.{file_path.stem}",
+        "_lazy_file": file_path,
+        "_lazy_class_name": class_name,
+        "_lazy_node_name": node_name or class_name,
+        "_lazy_defined": frozenset(class_info["defined"]),
+        "_lazy_assigned": {},
+        "_lazy_real": None,
+    })
+    return _LazyNodeMeta(class_name, (), namespace)
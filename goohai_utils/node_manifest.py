@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# 节点清单：静态扫描 nodes/ 下的文件，无需导入即可得到节点映射
+import ast
+import json
+import os
+
+# 扫描规则变化时递增，旧缓存自动失效
+MANIFEST_VERSION = 1
+
+
+def scan_node_file(file_path):
+    """用AST解析单个节点文件，返回清单条目；无法静态确定映射时标记为eager"""
+    entry = {"eager": True, "classes": {}, "class_mappings": {}, "display_mappings": {}}
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            source = f.read()
+        tree = ast.parse(source, filename=str(file_path))
+    except Exception:
+        return entry
+
+    classes = {}
+    class_mappings = None
+    display_mappings = {}
+    rebound = set()
+
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            # 带基类、装饰器或元类的节点类无法安全代理，整文件改为启动时导入
+            if node.bases or node.keywords or node.decorator_list:
+                return entry
+            classes[node.name] = _scan_class(node, source)
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if not isinstance(target, ast.Name):
+                    continue
+                if target.id == "NODE_CLASS_MAPPINGS":
+                    if class_mappings is not None or not isinstance(node.value, ast.Dict):
+                        return entry
+                    class_mappings = {}
+                    for key, value in zip(node.value.keys, node.value.values):
+                        if not (isinstance(key, ast.Constant) and isinstance(key.value, str)
+                                and isinstance(value, ast.Name)):
+                            return entry
+                        class_mappings[key.value] = value.id
+                elif target.id == "NODE_DISPLAY_NAME_MAPPINGS":
+                    try:
+                        display_mappings = ast.literal_eval(node.value)
+                    except ValueError:
+                        return entry
+                else:
+                    rebound.add(target.id)
+
+    # 映射表在定义后又被修改（update/下标赋值）时同样不做懒加载
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) \
+                and node.value.id == "NODE_CLASS_MAPPINGS":
+            return entry
+        if isinstance(node, ast.Subscript) and isinstance(node.ctx, ast.Store) \
+                and isinstance(node.value, ast.Name) and node.value.id == "NODE_CLASS_MAPPINGS":
+            return entry
+
+    if not class_mappings:
+        return entry
+    for class_name in class_mappings.values():
+        if class_name not in classes or class_name in rebound:
+            return entry
+
+    entry["eager"] = False
+    entry["classes"] = {name: classes[name] for name in set(class_mappings.values())}
+    entry["class_mappings"] = class_mappings
+    entry["display_mappings"] = display_mappings
+    return entry
+
+
+def _scan_class(class_node, source):
+    """记录类体中定义的全部名称，以及可直接字面量求值的属性源码"""
+    defined = []
+    literals = {}
+    for stmt in class_node.body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            defined.append(stmt.name)
+        elif isinstance(stmt, (ast.Assign, ast.AnnAssign)):
+            targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+            for target in targets:
+                if not isinstance(target, ast.Name):
+                    continue
+                defined.append(target.id)
+                if stmt.value is None:
+                    continue
+                try:
+                    ast.literal_eval(stmt.value)
+                except ValueError:
+                    literals.pop(target.id, None)
+                    continue
+                literals[target.id] = ast.get_source_segment(source, stmt.value)
+    return {"defined": sorted(set(defined)), "literals": literals}
+
+
+def load_manifest(nodes_dir, cache_path):
+    """读取缓存清单，仅重新扫描修改时间或大小发生变化的文件，返回 {文件名: 条目}"""
+    cached = {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            cached = data.get("files", {})
+    except (OSError, ValueError):
+        pass
+
+    files = {}
+    changed = False
+    for file_path in nodes_dir.glob("*.py"):
+        if file_path.name == "__init__.py":
+            continue
+        try:
+            stat = file_path.stat()
+        except OSError:
+            continue
+        old = cached.get(file_path.name)
+        if old and old.get("mtime") == stat.st_mtime and old.get("size") == stat.st_size:
+            files[file_path.name] = old
+            continue
+        entry = scan_node_file(file_path)
+        entry["mtime"] = stat.st_mtime
+        entry["size"] = stat.st_size
+        files[file_path.name] = entry
+        changed = True
+
+    if changed or set(files) != set(cached):
+        try:
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "files": files}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # 只读安装目录下不写缓存，下次启动重新扫描即可
+            print(f"【孤海工具箱】节点清单缓存写入失败: {str(e)}")
+    return files
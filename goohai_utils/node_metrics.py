@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# 节点执行指标：包装每个节点的 FUNCTION 入口，记录耗时、CPU时间、峰值内存增长和输入输出张量规模
+#
+# 峰值内存增长 = 执行期间采样到的最大常驻内存 - 开始时的常驻内存；执行期间由后台线程按
+# GOOHAI_METRICS_RSS_INTERVAL 秒（默认 0.01）采样当前常驻内存。多个节点并发执行时统计的是整个进程的内存。
+#
+# 输出两个文件（目录默认为插件下的 metrics/，可用 GOOHAI_METRICS_DIR 指定）：
+# - node_metrics.jsonl  每次执行一行明细，超过 GOOHAI_METRICS_MAX_BYTES 后滚动为 .1
+# - node_metrics.prom   Prometheus 文本格式的累计指标，可交给 node_exporter 的 textfile collector
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+METRICS_DIR = os.environ.get("GOOHAI_METRICS_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "metrics"
+)
+MAX_BYTES = int(os.environ.get("GOOHAI_METRICS_MAX_BYTES", str(5 * 1024 * 1024)))
+RSS_INTERVAL = max(0.001, float(os.environ.get("GOOHAI_METRICS_RSS_INTERVAL", "0.01")))
+
+_锁 = threading.Lock()
+_汇总 = {}
+_页大小 = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes():
+    """进程当前常驻内存（字节），无法获取时返回 None"""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * _页大小
+        except (OSError, ValueError, IndexError):
+            pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+class RSSSampler:
+    """在后台线程中采样当前常驻内存，记录从 start() 到 stop() 之间的最大值"""
+
+    def __init__(self, interval=None):
+        self.interval = RSS_INTERVAL if interval is None else interval
+        self.start_rss = None
+        self.max_rss = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None and (self.max_rss is None or rss > self.max_rss):
+            self.max_rss = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self.start_rss = current_rss_bytes()
+        self.max_rss = self.start_rss
+        if self.start_rss is not None:
+            self._thread = threading.Thread(target=self._run, name="goohai-rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """停止采样，返回执行期间的峰值内存增长（字节），无法获取时返回 None"""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return max(0, self.max_rss - self.start_rss)
+
+
+def describe_tensors(value, limit=16):
+    """收集参数/返回值中的张量形状与字节数（不导入 torch，按属性判断）"""
+    found = []
+
+    def walk(v):
+        if len(found) >= limit:
+            return
+        if hasattr(v, "shape") and hasattr(v, "element_size") and hasattr(v, "nelement"):
+            found.append({
+                "shape": list(v.shape),
+                "dtype": str(v.dtype).replace("torch.", ""),
+                "bytes": int(v.element_size() * v.nelement()),
+            })
+        elif isinstance(v, dict):
+            for item in v.values():
+                walk(item)
+        elif isinstance(v, (list, tuple)):
+            for item in v:
+                walk(item)
+
+    walk(value)
+    return found
+
+
+def _record(entry):
+    name = entry["node"]
+    with _锁:
+        stats = _汇总.setdefault(name, {
+            "count": 0, "errors": 0, "wall_sum": 0.0, "wall_max": 0.0, "cpu_sum": 0.0,
+            "rss_delta_max": 0, "input_bytes_sum": 0, "output_bytes_sum": 0,
+        })
+        stats["count"] += 1
+        stats["errors"] += 0 if entry["ok"] else 1
+        stats["wall_sum"] += entry["wall_seconds"]
+        stats["wall_max"] = max(stats["wall_max"], entry["wall_seconds"])
+        stats["cpu_sum"] += entry["cpu_seconds"]
+        stats["rss_delta_max"] = max(stats["rss_delta_max"], entry["peak_rss_delta_bytes"] or 0)
+        stats["input_bytes_sum"] += sum(t["bytes"] for t in entry["inputs"])
+        stats["output_bytes_sum"] += sum(t["bytes"] for t in entry["outputs"])
+
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            log_path = os.path.join(METRICS_DIR, "node_metrics.jsonl")
+            if os.path.exists(log_path) and os.path.getsize(log_path) > MAX_BYTES:
+                os.replace(log_path, log_path + ".1")
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            _write_prometheus(os.path.join(METRICS_DIR, "node_metrics.prom"))
+        except OSError as e:
+            print(f"【孤海工具箱】节点指标写入失败: {str(e)}")
+
+
+def _write_prometheus(path):
+    metrics = (
+        ("goohai_node_executions_total", "counter", "节点执行次数", "count"),
+        ("goohai_node_errors_total", "counter", "节点执行异常次数", "errors"),
+        ("goohai_node_wall_seconds_sum", "counter", "节点累计墙钟耗时（秒）", "wall_sum"),
+        ("goohai_node_wall_seconds_max", "gauge", "节点单次最大墙钟耗时（秒）", "wall_max"),
+        ("goohai_node_cpu_seconds_sum", "counter", "节点累计进程CPU时间（秒）", "cpu_sum"),
+        ("goohai_node_peak_rss_delta_bytes_max", "gauge", "单次执行期间常驻内存相对开始时的最大增长（字节，后台采样）", "rss_delta_max"),
+        ("goohai_node_input_tensor_bytes_sum", "counter", "输入张量累计字节数", "input_bytes_sum"),
+        ("goohai_node_output_tensor_bytes_sum", "counter", "输出张量累计字节数", "output_bytes_sum"),
+    )
+    lines = []
+    for metric, kind, help_text, field in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, stats in sorted(_汇总.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{metric}{{node="{label}"}} {round(stats[field], 6)}')
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def _wrap(node_name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        sampler = RSSSampler().start()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        ok = True
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception:
+            ok = False
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            rss_delta = sampler.stop()
+            _record({
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "node": node_name,
+                "ok": ok,
+                "wall_seconds": round(wall, 5),
+                "cpu_seconds": round(cpu, 5),
+                "peak_rss_delta_bytes": rss_delta,
+                "inputs": describe_tensors(kwargs),
+                "outputs": describe_tensors(result),
+            })
+
+    wrapper._goohai_instrumented = True
+    return wrapper
+
+
+def instrument_node_class(node_name, cls):
+    """给节点类的 FUNCTION 入口加上指标记录，重复调用不会重复包装"""
+    func_name = getattr(cls, "FUNCTION", None)
+    if not func_name:
+        return cls
+    raw = None
+    for klass in cls.__mro__:
+        if func_name in klass.__dict__:
+            raw = klass.__dict__[func_name]
+            break
+    if raw is None:
+        return cls
+    if isinstance(raw, (classmethod, staticmethod)):
+        inner = raw.__func__
+        if getattr(inner, "_goohai_instrumented", False):
+            return cls
+        setattr(cls, func_name, type(raw)(_wrap(node_name, inner)))
+    elif callable(raw) and not getattr(raw, "_goohai_instrumented", False):
+        setattr(cls, func_name, _wrap(node_name, raw))
+    return cls
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# 多进程执行：在独立的 Python 子进程中加载节点文件并调用节点方法
+#
+# 不使用 multiprocessing：spawn 方式会在子进程中重新导入 ComfyUI 的 main.py，
+# fork 方式在已初始化 CUDA / 多线程的进程中也不安全。这里直接启动解释器运行本文件，
+# 参数和返回值通过 JSON 文件传递（参数、返回值都必须能 JSON 序列化）。
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import traceback
+from pathlib import Path
+
+
+def run_in_processes(node_file, class_name, method, calls, threads_per_process=None):
+    """每组参数启动一个子进程执行 class_name().method(*args)，等待全部结束
+
+    返回与 calls 顺序一致的 [(是否成功, 返回值或错误信息)]，单个子进程失败不影响其他子进程
+    """
+    env = dict(os.environ)
+    if threads_per_process:
+        # 子进程内的共享线程池按分到的核数设置，避免线程数超过 CPU 核数
+        env["GOOHAI_WORKERS"] = str(threads_per_process)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="goohai_worker_") as tmp_dir:
+        processes = []
+        try:
+            for index, args in enumerate(calls):
+                job_path = os.path.join(tmp_dir, f"job_{index}.json")
+                result_path = os.path.join(tmp_dir, f"result_{index}.json")
+                with open(job_path, "w", encoding="utf-8") as f:
+                    json.dump({
+                        "sys_path": sys.path,
+                        "node_file": str(node_file),
+                        "class_name": class_name,
+                        "method": method,
+                        "args": list(args),
+                        "result_path": result_path,
+                    }, f, ensure_ascii=False)
+                proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), job_path], env=env)
+                processes.append((proc, result_path))
+
+            for proc, result_path in processes:
+                code = proc.wait()
+                try:
+                    with open(result_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    results.append((data["ok"], data["result"] if data["ok"] else data["error"]))
+                except (OSError, ValueError):
+                    results.append((False, f"子进程异常退出（退出码 {code}）"))
+        finally:
+            # 父进程出错或被中断时结束仍在运行的子进程
+            for proc, _ in processes:
+                if proc.poll() is None:
+                    proc.kill()
+    return results
+
+
+def _main(job_path):
+    with open(job_path, "r", encoding="utf-8") as f:
+        job = json.load(f)
+    # 使用父进程的模块搜索路径，保证 goohai_utils、comfy、folder_paths 等可以导入
+    sys.path[:0] = [p for p in job["sys_path"] if p not in sys.path]
+    try:
+        from goohai_utils.lazy_nodes import load_node_module
+        module = load_node_module(Path(job["node_file"]))
+        node = getattr(module, job["class_name"])()
+        data = {"ok": True, "result": getattr(node, job["method"])(*job["args"])}
+    except Exception:
+        data = {"ok": False, "error": traceback.format_exc()}
+    with open(job["result_path"], "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1])
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# 多页文档写出：排版结果逐页追加到一个 PDF / TIFF 文件，已写出的页面不保留在内存中
+#
+# - PDF：第一页新建文件，之后每页以增量更新方式追加（图像数据只写一次）
+# - TIFF：整个任务保持一个 AppendingTiffWriter，每页写成一帧
+# 同一个文档只能在一个线程中按顺序追加（由 BackgroundWriter 保证）
+from PIL import TiffImagePlugin
+
+DOCUMENT_FORMATS = ("PDF", "TIFF")
+
+
+class PageDocumentWriter:
+    def __init__(self, path, fmt, dpi, **save_options):
+        if fmt not in DOCUMENT_FORMATS:
+            raise ValueError(f"不支持的多页文档格式: {fmt}")
+        self.path = path
+        self.format = fmt
+        self.dpi = dpi
+        self.save_options = save_options
+        self.pages = 0
+        self._tiff = None
+
+    def add_page(self, image):
+        """追加一页，image 应为 RGB 图像"""
+        if self.format == "PDF":
+            # 前面的页都写失败时重新建文件
+            image.save(
+                self.path, format="PDF", append=self.pages > 0,
+                dpi=(self.dpi, self.dpi), **self.save_options
+            )
+        else:
+            if self._tiff is None:
+                self._tiff = TiffImagePlugin.AppendingTiffWriter(self.path, new=True)
+            image.save(self._tiff, format="TIFF", dpi=(self.dpi, self.dpi), **self.save_options)
+            self._tiff.newFrame()
+        self.pages += 1
+
+    def close(self):
+        if self._tiff is not None:
+            tiff, self._tiff = self._tiff, None
+            tiff.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# 矩形装箱（MaxRects）：把不同尺寸的照片装进尽量少的同尺寸画布
+#
+# - 每张画布维护全部"最大空闲矩形"，放入时按最短边剩余最小（Best Short Side Fit）选位置
+# - 照片按面积从大到小依次放入第一张放得下的画布，都放不下时新开一张
+# - 每个项目可以给出多种候选尺寸（如旋转 90 度后的尺寸），装箱时选得分最好的一种
+# 间距由调用方把间距加到项目和画布尺寸上处理，这里只做不重叠的装箱
+
+
+class MaxRectsBin:
+    """单张画布的空闲区域"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+        self.used_area = 0
+
+    def find(self, options):
+        """返回最佳位置 (得分, x, y, 候选序号)，放不下时返回 None"""
+        best = None
+        for option_index, (w, h) in enumerate(options):
+            for fx, fy, fw, fh in self.free:
+                if w <= fw and h <= fh:
+                    short_side = min(fw - w, fh - h)
+                    long_side = max(fw - w, fh - h)
+                    score = (short_side, long_side, fy, fx)
+                    if best is None or score < best[0]:
+                        best = (score, fx, fy, option_index)
+        return best
+
+    def place(self, x, y, w, h):
+        new_free = []
+        for rect in self.free:
+            if self._intersects(rect, x, y, w, h):
+                new_free.extend(self._split(rect, x, y, w, h))
+            else:
+                new_free.append(rect)
+        self.free = self._prune(new_free)
+        self.used_area += w * h
+
+    @staticmethod
+    def _intersects(rect, x, y, w, h):
+        fx, fy, fw, fh = rect
+        return x < fx + fw and x + w > fx and y < fy + fh and y + h > fy
+
+    @staticmethod
+    def _split(rect, x, y, w, h):
+        # 空闲矩形被占用区域切开后，剩余部分的最大矩形（最多四个，互相可以重叠）
+        fx, fy, fw, fh = rect
+        parts = []
+        if x > fx:
+            parts.append((fx, fy, x - fx, fh))
+        if x + w < fx + fw:
+            parts.append((x + w, fy, fx + fw - x - w, fh))
+        if y > fy:
+            parts.append((fx, fy, fw, y - fy))
+        if y + h < fy + fh:
+            parts.append((fx, y + h, fw, fy + fh - y - h))
+        return parts
+
+    @staticmethod
+    def _prune(rects):
+        # 去掉被其他空闲矩形完全包含的矩形
+        rects = sorted(set(rects), key=lambda r: r[2] * r[3], reverse=True)
+        kept = []
+        for rect in rects:
+            x, y, w, h = rect
+            if not any(
+                kx <= x and ky <= y and x + w <= kx + kw and y + h <= ky + kh
+                for kx, ky, kw, kh in kept
+            ):
+                kept.append(rect)
+        return kept
+
+
+def pack_rects(items, bin_width, bin_height):
+    """把 items 装进尽量少的 bin_width x bin_height 画布
+
+    items 为每个项目的候选尺寸列表 [[(宽, 高), ...], ...]。
+    返回 (sheets, unplaced)：sheets 为每张画布的 [(项目序号, x, y, 宽, 高, 候选序号)]，按放入顺序排列；
+    unplaced 为单独一张画布也放不下的项目序号
+    """
+    order = sorted(
+        range(len(items)),
+        key=lambda i: (-max(w * h for w, h in items[i]), -max(max(w, h) for w, h in items[i]), i),
+    )
+    bins, sheets, unplaced = [], [], []
+    for index in order:
+        options = items[index]
+        if not any(w <= bin_width and h <= bin_height for w, h in options):
+            unplaced.append(index)
+            continue
+        for bin_, sheet in zip(bins, sheets):
+            found = bin_.find(options)
+            if found is not None:
+                break
+        else:
+            bin_, sheet = MaxRectsBin(bin_width, bin_height), []
+            bins.append(bin_)
+            sheets.append(sheet)
+            found = bin_.find(options)
+        _, x, y, option_index = found
+        w, h = options[option_index]
+        bin_.place(x, y, w, h)
+        sheet.append((index, x, y, w, h, option_index))
+    return sheets, sorted(unplaced)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# 尺寸规则：按文件名中的尺寸名（如 "【2寸】3.5x4.9,画布:8.9x12.7"）识别照片尺寸
+#
+# 规则文本每条写作 【尺寸名】宽x高，可选 ",画布:宽x高"；数值单位为厘米。
+# 孤海-根据文件名识别尺寸 和 孤海批量自动排版 的混合尺寸模式共用这里的解析和匹配。
+import re
+
+# 文件名中的中文数字尺寸先转换为阿拉伯数字格式再匹配
+中文尺寸映射 = {
+    "一寸": "1寸",
+    "二寸": "2寸",
+    "两寸": "2寸",
+    "三寸": "3寸",
+    "四寸": "4寸",
+    "五寸": "5寸",
+    "六寸": "6寸",
+    "七寸": "7寸"
+}
+
+_规则格式 = re.compile(
+    r'【(.*?)】\s*([\d.]+)\s*[xX×]\s*([\d.]+)\s*(?:[,，]\s*画布\s*[:：=]?\s*([\d.]+)\s*[xX×]\s*([\d.]+))?'
+)
+_尺寸格式 = re.compile(r'^\s*([\d.]+)\s*[xX×]\s*([\d.]+)\s*$')
+
+
+def parse_size_rules(text):
+    """解析规则文本，返回 [(尺寸名, 宽, 高, 画布宽, 画布高)]，数值为字符串，画布未写时为空字符串"""
+    return _规则格式.findall(text)
+
+
+def normalize_name(filename):
+    """把文件名中的中文数字尺寸（一寸、两寸等）替换为数字格式"""
+    for 中文尺寸, 数字尺寸 in 中文尺寸映射.items():
+        if 中文尺寸 in filename:
+            filename = filename.replace(中文尺寸, 数字尺寸)
+    return filename
+
+
+def match_size_rule(filename, rules):
+    """返回第一条尺寸名出现在文件名中的规则，没有匹配时返回 None"""
+    filename = normalize_name(filename)
+    for rule in rules:
+        if rule[0] in filename:
+            return rule
+    return None
+
+
+def parse_size(text):
+    """解析 "宽x高" 形式的尺寸，返回 (宽, 高)，格式不对时返回 None"""
+    match = _尺寸格式.match(text)
+    if not match:
+        return None
+    try:
+        return float(match.group(1)), float(match.group(2))
+    except ValueError:
+        return None
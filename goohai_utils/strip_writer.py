@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# 分带写出：大幅面画布按水平条带逐段编码写盘，峰值内存只有一个条带
+#
+# Pillow 只能一次编码整张图，这里直接按格式写出：
+# - PNG：逐行 Up 滤波后用 zlib 流式压缩，每个条带写成若干 IDAT 块，pHYs 记录分辨率
+# - TIFF：每个条带一个 Deflate 压缩的 strip（水平差分预测），每页写完后追加 IFD，可连续写多页
+# 用法：begin_page(宽, 高, 模式) → 按从上到下的顺序 write_rows(条带图片) → end_page()，全部结束后 close()
+# 同一个写出器只能在一个线程中按顺序调用（由 BackgroundWriter 保证）
+import struct
+import zlib
+
+import numpy as np
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_COLOR_TYPES = {"RGB": 2, "RGBA": 6}
+_IDAT_SIZE = 1 << 20
+
+
+class StripPNGWriter:
+    """单页 PNG，文件在写入第一个条带时才创建"""
+
+    def __init__(self, path, dpi, compress_level=6):
+        self.path = path
+        self.dpi = dpi
+        self.compress_level = compress_level
+        self._file = None
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack(">I", len(data)) + kind + data)
+        self._file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def begin_page(self, width, height, mode):
+        if mode not in _PNG_COLOR_TYPES:
+            raise ValueError(f"分带写出 PNG 不支持的模式: {mode}")
+        self.width, self.height, self.mode = width, height, mode
+        self._rows = 0
+        self._prev = None
+        self._pending = b""
+        self._z = zlib.compressobj(self.compress_level)
+        self._file = open(self.path, "wb")
+        self._file.write(_PNG_SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, _PNG_COLOR_TYPES[mode], 0, 0, 0))
+        ppm = int(round(self.dpi / 0.0254))
+        self._chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+
+    def write_rows(self, image):
+        rows = np.asarray(image.convert(self.mode) if image.mode != self.mode else image)
+        rows = rows.reshape(rows.shape[0], -1)
+        # Up 滤波：每行减去上一行（跨条带保留上一行），大面积纯色背景压缩效果好
+        prev = self._prev if self._prev is not None else np.zeros_like(rows[0])
+        filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 2
+        filtered[0, 1:] = rows[0] - prev
+        filtered[1:, 1:] = rows[1:] - rows[:-1]
+        self._prev = rows[-1].copy()
+        self._rows += rows.shape[0]
+        self._pending += self._z.compress(filtered.tobytes())
+        while len(self._pending) >= _IDAT_SIZE:
+            self._chunk(b"IDAT", self._pending[:_IDAT_SIZE])
+            self._pending = self._pending[_IDAT_SIZE:]
+
+    def end_page(self):
+        if self._rows != self.height:
+            raise ValueError(f"写入行数 {self._rows} 与图片高度 {self.height} 不一致")
+        self._pending += self._z.flush()
+        if self._pending:
+            self._chunk(b"IDAT", self._pending)
+        self._chunk(b"IEND", b"")
+        self._file.close()
+        self._file = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class StripTIFFWriter:
+    """多页 TIFF（经典 TIFF，文件不超过 4GB），文件在写入第一个条带时才创建"""
+
+    def __init__(self, path, dpi, compress_level=6):
+        self.path = path
+        self.dpi = dpi
+        self.compress_level = compress_level
+        self.pages = 0
+        self._file = None
+        # 上一页 IFD 中"下一个 IFD 偏移"字段的位置，第一页写在文件头
+        self._next_ifd_pos = 4
+
+    def begin_page(self, width, height, mode):
+        if mode not in ("RGB", "RGBA"):
+            raise ValueError(f"分带写出 TIFF 不支持的模式: {mode}")
+        if self._file is None:
+            self._file = open(self.path, "w+b")
+            self._file.write(b"II*\x00" + struct.pack("<I", 0))
+        self.width, self.height, self.mode = width, height, mode
+        self._rows = 0
+        self._rows_per_strip = None
+        self._strips = []
+
+    def _offset(self):
+        offset = self._file.tell()
+        if offset > 0xFFFFFFFF:
+            raise OSError("TIFF 文件超过 4GB，请减少每个文件的页数")
+        return offset
+
+    def write_rows(self, image):
+        rows = np.asarray(image.convert(self.mode) if image.mode != self.mode else image)
+        if self._rows_per_strip is None:
+            self._rows_per_strip = rows.shape[0]
+        elif self._strips and self._strips[-1][2] != self._rows_per_strip:
+            raise ValueError("只有最后一个条带的行数可以小于其他条带")
+        # 水平差分预测（Predictor=2）：每个像素减去左侧像素
+        diff = rows.copy()
+        diff[:, 1:] = rows[:, 1:] - rows[:, :-1]
+        data = zlib.compress(diff.tobytes(), self.compress_level)
+        self._file.seek(0, 2)
+        offset = self._offset()
+        self._file.write(data)
+        self._strips.append((offset, len(data), rows.shape[0]))
+        self._rows += rows.shape[0]
+
+    def end_page(self):
+        if self._rows != self.height:
+            raise ValueError(f"写入行数 {self._rows} 与图片高度 {self.height} 不一致")
+        f = self._file
+        f.seek(0, 2)
+        if f.tell() % 2:
+            f.write(b"\x00")
+        channels = len(self.mode)
+
+        # IFD 之外的数据（多值字段）先写出，记录偏移
+        def extra(data):
+            offset = self._offset()
+            f.write(data)
+            if len(data) % 2:
+                f.write(b"\x00")
+            return offset
+
+        bits = extra(struct.pack(f"<{channels}H", *([8] * channels)))
+        strip_offsets = [s[0] for s in self._strips]
+        strip_counts = [s[1] for s in self._strips]
+        offsets_value = extra(struct.pack(f"<{len(strip_offsets)}I", *strip_offsets)) if len(strip_offsets) > 1 else strip_offsets[0]
+        counts_value = extra(struct.pack(f"<{len(strip_counts)}I", *strip_counts)) if len(strip_counts) > 1 else strip_counts[0]
+        resolution = extra(struct.pack("<II", int(self.dpi), 1))
+
+        SHORT, LONG, RATIONAL = 3, 4, 5
+        entries = [
+            (256, LONG, 1, self.width),
+            (257, LONG, 1, self.height),
+            (258, SHORT, channels, bits),
+            (259, SHORT, 1, 8),                     # Deflate
+            (262, SHORT, 1, 2),                     # RGB
+            (273, LONG, len(strip_offsets), offsets_value),
+            (277, SHORT, 1, channels),
+            (278, LONG, 1, self._rows_per_strip),
+            (279, LONG, len(strip_counts), counts_value),
+            (282, RATIONAL, 1, resolution),
+            (283, RATIONAL, 1, resolution),
+            (284, SHORT, 1, 1),                     # 像素交错存放
+            (296, SHORT, 1, 2),                     # 分辨率单位：英寸
+            (317, SHORT, 1, 2),                     # 水平差分预测
+        ]
+        if channels == 4:
+            entries.append((338, SHORT, 1, 2))      # 非预乘 alpha
+        ifd_offset = self._offset()
+        f.write(struct.pack("<H", len(entries)))
+        for tag, kind, count, value in entries:
+            if kind == SHORT and count == 1:
+                f.write(struct.pack("<HHIHH", tag, kind, count, value, 0))
+            else:
+                f.write(struct.pack("<HHII", tag, kind, count, value))
+        next_pos = f.tell()
+        f.write(struct.pack("<I", 0))
+        # 把本页 IFD 链接到上一页（或文件头）
+        f.seek(self._next_ifd_pos)
+        f.write(struct.pack("<I", ifd_offset))
+        self._next_ifd_pos = next_pos
+        self.pages += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
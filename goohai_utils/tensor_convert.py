@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# 张量 / PIL / ndarray 互转：尽量复用内存，避免每次转换产生多份整图拷贝
+#
+# ComfyUI 约定：IMAGE 为 [B,H,W,C] float32 (0-1)，MASK 为 [B,H,W] float32 (0-1)
+# - float -> uint8 按块缩放，临时浮点缓冲按线程复用，额外内存只占一个分块
+# - uint8 -> float 直接写入预先分配好的张量内存，只分配一次
+# - 后续是 numpy/cv2 操作时用 tensor_to_uint8 / uint8_to_tensor，跳过 PIL 往返
+import threading
+
+import numpy as np
+import torch
+from PIL import Image
+
+# 每个分块的元素个数（4M 个 float32 约 16MB）
+_CHUNK_ELEMENTS = 1 << 22
+_scratch = threading.local()
+
+
+def _float_scratch(size):
+    buf = getattr(_scratch, "buf", None)
+    if buf is None or buf.size < size:
+        buf = np.empty(min(size, _CHUNK_ELEMENTS), dtype=np.float32)
+        _scratch.buf = buf
+    return buf[:size]
+
+
+def _as_numpy(tensor):
+    """CPU float32 张量零拷贝转为 ndarray"""
+    if isinstance(tensor, torch.Tensor):
+        tensor = tensor.detach()
+        if tensor.device.type != "cpu":
+            tensor = tensor.cpu()
+        if tensor.dtype != torch.float32:
+            tensor = tensor.float()
+        return tensor.numpy()
+    return np.asarray(tensor)
+
+
+def float_to_uint8(array, out=None):
+    """0-1 浮点数组转为 0-255 uint8（截断取整，与 astype(np.uint8) 一致），可传入 out 复用输出缓冲"""
+    src = np.ascontiguousarray(array).reshape(-1)
+    if out is None:
+        out = np.empty(array.shape, dtype=np.uint8)
+    dst = out.reshape(-1)
+    for start in range(0, src.size, _CHUNK_ELEMENTS):
+        end = min(start + _CHUNK_ELEMENTS, src.size)
+        tmp = _float_scratch(end - start)
+        np.multiply(src[start:end], 255.0, out=tmp)
+        np.clip(tmp, 0, 255, out=tmp)
+        np.copyto(dst[start:end], tmp, casting="unsafe")
+    return out
+
+
+def uint8_to_float(array, out=None):
+    """uint8 数组转为 0-1 float32，结果直接写入 out（可为张量的 numpy 视图）"""
+    if out is None:
+        out = np.empty(array.shape, dtype=np.float32)
+    np.divide(array, np.float32(255.0), out=out, dtype=np.float32)
+    return out
+
+
+def tensor_to_uint8(tensor, out=None):
+    """IMAGE/MASK 张量（任意维度）转为同形状 uint8 ndarray，适合直接交给 numpy/cv2"""
+    return float_to_uint8(_as_numpy(tensor), out=out)
+
+
+def uint8_to_tensor(array, batch=True):
+    """uint8 ndarray（HxW 或 HxWxC）转为 float32 张量，batch=True 时加上批次维"""
+    shape = (1,) + array.shape if batch else array.shape
+    tensor = torch.empty(shape, dtype=torch.float32)
+    uint8_to_float(array, out=tensor.numpy().reshape(array.shape))
+    return tensor
+
+
+def tensor_to_pil(image, index=0):
+    """IMAGE 张量转为 PIL 图像；4 维时取批次中第 index 张，单通道转为 L 模式"""
+    if image.dim() == 4:
+        image = image[index]
+    arr = tensor_to_uint8(image)
+    if arr.ndim == 3 and arr.shape[-1] == 1:
+        arr = arr[..., 0]
+    return Image.fromarray(arr)
+
+
+def tensor_to_pil_list(images):
+    """整个批次转为 PIL 图像列表"""
+    if images.dim() < 4:
+        return [tensor_to_pil(images)]
+    return [tensor_to_pil(images, i) for i in range(images.shape[0])]
+
+
+def mask_to_pil(mask, index=0):
+    """MASK 张量转为 L 模式 PIL 图像；3 维时取批次中第 index 张"""
+    if mask.dim() == 4:
+        mask = mask[..., 0]
+    if mask.dim() == 3:
+        mask = mask[index]
+    return Image.fromarray(tensor_to_uint8(mask))
+
+
+def pil_to_tensor(image, batch=True):
+    """PIL 图像转为 IMAGE 张量 [1,H,W,C]（batch=False 时为 [H,W,C]）"""
+    return uint8_to_tensor(np.asarray(image), batch=batch)
+
+
+def pil_to_mask(image, batch=False):
+    """PIL 图像转为 MASK 张量 [H,W]（batch=True 时为 [1,H,W]），非 L 模式先转灰度"""
+    if image.mode != "L":
+        image = image.convert("L")
+    return uint8_to_tensor(np.asarray(image), batch=batch)
+
+
+def pils_to_tensor(images):
+    """同尺寸 PIL 图像列表直接写入一块预分配的 [B,H,W,C] 张量，省去 torch.stack 的整批拷贝"""
+    first = np.asarray(images[0])
+    batch = torch.empty((len(images),) + first.shape, dtype=torch.float32)
+    batch_np = batch.numpy()
+    for i, image in enumerate(images):
+        arr = first if i == 0 else np.asarray(image)
+        uint8_to_float(arr, out=batch_np[i])
+    return batch
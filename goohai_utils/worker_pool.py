@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# 进程级共享线程池：各节点的逐图 CPU 计算（cv2 / PIL / numpy 会释放 GIL）提交到同一个池
+#
+# - 线程数默认等于 CPU 核数，可用环境变量 GOOHAI_WORKERS 指定（1 表示全部串行）
+# - map_ordered 按输入顺序返回结果，单项异常不会影响其他项；submit_ordered 先提交、稍后取结果，用于预读
+# - 在池内线程中再次调用 map_ordered 时直接串行执行，避免嵌套等待占满线程导致死锁
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+WORKERS = max(1, int(os.environ.get("GOOHAI_WORKERS", str(os.cpu_count() or 1))))
+
+_池 = None
+_池锁 = threading.Lock()
+_线程标记 = threading.local()
+
+
+def _mark_worker():
+    _线程标记.in_pool = True
+
+
+def get_executor():
+    """返回共享线程池，首次使用时创建"""
+    global _池
+    if _池 is None:
+        with _池锁:
+            if _池 is None:
+                _池 = ThreadPoolExecutor(
+                    max_workers=WORKERS, thread_name_prefix="goohai", initializer=_mark_worker
+                )
+    return _池
+
+
+def in_worker():
+    """当前线程是否为共享池的工作线程"""
+    return getattr(_线程标记, "in_pool", False)
+
+
+class PendingResults:
+    """submit_ordered 返回的句柄：result() 按输入顺序取全部结果"""
+
+    def __init__(self, func, items, on_error, futures):
+        self._func = func
+        self._items = items
+        self._on_error = on_error
+        self._futures = futures
+
+    def result(self):
+        """等待全部完成并返回结果列表；出错规则同 map_ordered"""
+        results = []
+        first_error = None
+        for index, item in enumerate(self._items):
+            try:
+                results.append(self._futures[index].result() if self._futures else self._func(item))
+            except Exception as e:
+                if self._on_error is None:
+                    first_error = first_error or e
+                    results.append(None)
+                else:
+                    results.append(self._on_error(item, e))
+        if first_error is not None:
+            raise first_error
+        return results
+
+    def cancel(self):
+        """取消尚未开始的任务（已在运行的任务会执行完）"""
+        for future in self._futures or ():
+            future.cancel()
+
+
+def submit_ordered(func, items, on_error=None):
+    """把 func(item) 全部提交到共享线程池后立即返回 PendingResults，用于与当前工作重叠的预读
+
+    在池内线程中调用时不提交，result() 时串行执行
+    """
+    items = list(items)
+    futures = None
+    if not in_worker():
+        executor = get_executor()
+        futures = [executor.submit(func, item) for item in items]
+    return PendingResults(func, items, on_error, futures)
+
+
+def map_ordered(func, items, on_error=None):
+    """并行执行 func(item)，按输入顺序返回结果列表
+
+    on_error(item, exc) 的返回值会代替出错项的结果；未提供时等全部任务结束后抛出第一个异常
+    """
+    items = list(items)
+    if len(items) <= 1 or WORKERS <= 1 or in_worker():
+        return PendingResults(func, items, on_error, None).result()
+    return submit_ordered(func, items, on_error).result()
@@ -1,7 +1,8 @@
 import torch
 import numpy as np
 from PIL import Image
-from collections import defaultdict
+from goohai_utils.tensor_convert import tensor_to_uint8
+from goohai_utils.batch_exec import map_batch
 
 class ExtractDominantColor:
     @classmethod
@@ -31,18 +32,21 @@ class ExtractDominantColor:
 
     RETURN_TYPES = ("STRING",)  # 显式声明单一输出
     RETURN_NAMES = ("主色HEX",)
+    OUTPUT_IS_LIST = (True,)  # 批次中每张图像各输出一个颜色
     FUNCTION = "extract_color"
     CATEGORY = "孤海工具箱"
 
     def extract_color(self, image, 降采样系数, 颜色容差):
         # 多版本张量处理兼容
         if isinstance(image, torch.Tensor):
-            img_np = image.cpu().numpy()[0] * 255
+            images = tensor_to_uint8(image if image.dim() == 4 else image.unsqueeze(0))
         else:  # 兼容旧版本可能的数据格式
-            img_np = np.array(image) * 255
-        
-        # 确保图像数据有效性
-        img_np = np.clip(img_np, 0, 255).astype(np.uint8)
+            images = (np.clip(np.array(image) * 255, 0, 255).astype(np.uint8),)
+
+        colors = map_batch(lambda i: self._extract_single(images[i], 降采样系数, 颜色容差), len(images))
+        return (colors,)
+
+    def _extract_single(self, img_np, 降采样系数, 颜色容差):
         img = Image.fromarray(img_np.squeeze())
 
         # 安全降采样
@@ -59,19 +63,18 @@ class ExtractDominantColor:
             pixels = self._handle_alpha_channel(pixels)
         pixels = pixels.reshape(-1, 3)
 
-        # 智能颜色过滤
-        filtered = [p for p in pixels if not self._is_extreme_color(p)]
-        if not filtered:  # 回退机制
+        # 智能颜色过滤（整体向量化判断）
+        filtered = pixels[~self._is_extreme_color(pixels)]
+        if not len(filtered):  # 回退机制
             filtered = pixels
 
         # 精确颜色统计
-        color_counts = defaultdict(int)
-        for p in filtered:
-            q = self._quantize_color(p, 颜色容差)
-            color_counts[q] += 1
-
-        dominant = max(color_counts, key=lambda k: (color_counts[k], sum(k)))  # 频率+亮度排序
-        return (f"#{dominant[0]:02X}{dominant[1]:02X}{dominant[2]:02X}",)
+        quantized = self._quantize_color(filtered.astype(np.int32), 颜色容差)
+        colors, first_seen, counts = np.unique(quantized, axis=0, return_index=True, return_counts=True)
+        # 频率优先，其次亮度，再按首次出现的顺序
+        order = np.lexsort((first_seen, -colors.sum(axis=1), -counts))
+        dominant = colors[order[0]]
+        return f"#{dominant[0]:02X}{dominant[1]:02X}{dominant[2]:02X}"
 
     def _handle_alpha_channel(self, pixels):
         """处理透明通道的优化方法"""
@@ -80,16 +83,16 @@ class ExtractDominantColor:
         blended = (rgb * alpha).astype(np.uint8)
         return blended
 
-    def _is_extreme_color(self, pixel):
-        """智能过滤极端颜色"""
-        avg = np.mean(pixel)
-        return avg < 15 or avg > 240
+    def _is_extreme_color(self, pixels):
+        """智能过滤极端颜色（输入为 N×3 像素数组，返回布尔数组）"""
+        avg = pixels.mean(axis=-1)
+        return (avg < 15) | (avg > 240)
 
-    def _quantize_color(self, color, tolerance):
+    def _quantize_color(self, colors, tolerance):
         """精确颜色量化方法"""
         if tolerance == 0:
-            return tuple(color)
-        return tuple((c // tolerance) * tolerance for c in color)
+            return colors
+        return (colors // tolerance) * tolerance
 
 NODE_CLASS_MAPPINGS = {"ExtractDominantColor": ExtractDominantColor}
 NODE_DISPLAY_NAME_MAPPINGS = {"ExtractDominantColor": "孤海-主色提取 (多版本兼容)"}
\ No newline at end of file
@@ -1,9 +1,10 @@
-import torch
+import json
 import math
-import os
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import numpy as np
+import torch
+from PIL import Image, ImageDraw, ImageOps
 import comfy.utils
+from goohai_utils.tensor_convert import tensor_to_pil, pil_to_tensor
+from goohai_utils.font_cache import list_fonts, get_font, get_default_font
 
 def cm_to_pixels(cm, dpi):
     return int(cm * dpi / 2.54)
@@ -15,30 +16,18 @@ class SingleImageLayoutNode:
     @classmethod
     def get_font_list(cls):
         """获取fonts目录下的所有字体文件"""
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(current_dir)
-        font_dir = os.path.join(parent_dir, "fonts")
-        font_list = []
-        if os.path.exists(font_dir):
-            for file in os.listdir(font_dir):
-                if file.lower().endswith((".ttf", ".otf", ".ttc")):
-                    font_list.append(file)
-        return font_list
+        return list_fonts((".ttf", ".otf", ".ttc"))
     
     @classmethod
     def load_font(cls, font_name, font_size):
         """加载指定字体"""
         if not font_name or font_name == "默认字体":
-            return ImageFont.load_default()
+            return get_default_font()
         
         try:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(current_dir)
-            font_path = os.path.join(parent_dir, "fonts", font_name)
-
-            return ImageFont.truetype(font_path, font_size)
+            return get_font(font_name, font_size)
         except:
-            return ImageFont.load_default()
+            return get_default_font()
     
     @classmethod
     def add_border_to_image(cls, image, border_width):
@@ -76,24 +65,52 @@ class SingleImageLayoutNode:
                 "字体大小": ("INT", {"default": 0, "min": 0, "max": 100, "step": 1}),
                 "描边": ("INT", {"default": 0, "min": 0, "max": 10, "step": 1}),
                 "安全边距": ("FLOAT", {"default": 0.2, "min": 0.0, "max": 5.0, "step": 0.1}),
-                "自动切换横竖版": ("BOOLEAN", {"default": False})
+                "自动切换横竖版": ("BOOLEAN", {"default": False}),
+                # 仅规划：只计算布局，从 排版方案 输出照片位置和文字（JSON），不合成图像
+                "仅规划": ("BOOLEAN", {"default": False})
             }
         }
     
-    RETURN_TYPES = ("IMAGE",)
-    RETURN_NAMES = ("排版图像",)
+    RETURN_TYPES = ("IMAGE", "STRING")
+    RETURN_NAMES = ("排版图像", "排版方案")
     FUNCTION = "layout_image"
     CATEGORY = "孤海工具箱"
 
-    def layout_image(self, image, 相纸宽, 相纸高, 分辨率, 文件名, 照片间距, 字体, 字体大小, 描边, 安全边距, 自动切换横竖版):
+    def layout_image(self, image, 相纸宽, 相纸高, 分辨率, 文件名, 照片间距, 字体, 字体大小, 描边, 安全边距, 自动切换横竖版, 仅规划=False):
+        # 布局只依赖照片尺寸，从张量形状 [B,H,W,C] 读取，仅规划时不转换图像
+        img_h, img_w = int(image.shape[1]), int(image.shape[2])
+        layout = self.compute_layout(
+            img_w, img_h, 相纸宽, 相纸高, 分辨率, 文件名, 照片间距, 字体, 字体大小, 安全边距, 自动切换横竖版
+        )
+        plan = self.layout_plan(layout, 分辨率, 文件名)
+        if 仅规划:
+            # 仅规划时输出 64x64 黑色占位图，下游节点仍能按 [B,H,W,C] 读取
+            return (torch.zeros((1, 64, 64, 3)), plan)
+        
         # 将输入图像转换为PIL图像
-        img = self.tensor_to_pil(image)
-        img_w, img_h = img.size
+        img = tensor_to_pil(image)
         
         # 为照片添加描边（如果需要）
         if 描边 > 0:
             img = self.add_border_to_image(img, 描边)
         
+        # 创建新画布
+        canvas = Image.new("RGB", (layout["canvas_width"], layout["canvas_height"]), (255, 255, 255))
+        
+        # 放置图片（位置已确保不超出安全区域）
+        for x, y in layout["cells"]:
+            canvas.paste(img, (int(x), int(y)))
+        
+        # 添加文件名（居中）
+        if layout["text"] is not None:
+            text_x, text_y = layout["text"]
+            draw = ImageDraw.Draw(canvas)
+            draw.text((text_x, text_y), 文件名, font=layout["font"], fill=(0, 0, 0))
+        
+        return (pil_to_tensor(canvas), plan)
+
+    def compute_layout(self, img_w, img_h, 相纸宽, 相纸高, 分辨率, 文件名, 照片间距, 字体, 字体大小, 安全边距, 自动切换横竖版):
+        """计算画布尺寸、各照片左上角位置和文件名位置（照片尺寸不含描边），排版和仅规划共用"""
         # 计算文件名区域高度（如有需要）
         filename_area = 0
         if 字体大小 > 0:
@@ -109,7 +126,7 @@ class SingleImageLayoutNode:
             if landscape:
                 相纸宽, 相纸高 = 相纸高, 相纸宽
         
-        # 创建画布
+        # 画布尺寸
         canvas_width = cm_to_pixels(相纸宽, 分辨率)
         canvas_height = cm_to_pixels(相纸高, 分辨率)
         margin_px = cm_to_pixels(安全边距, 分辨率)
@@ -144,10 +161,8 @@ class SingleImageLayoutNode:
         img_start_x = start_x + (content_width - total_img_width) // 2
         img_start_y = start_y
         
-        # 创建新画布
-        canvas = Image.new("RGB", (canvas_width, canvas_height), (255, 255, 255))
-        
-        # 放置图片（确保不超出安全区域）
+        # 照片位置（只保留在安全区域内的）
+        cells = []
         for r in range(rows):
             for c in range(cols):
                 x = img_start_x + c * (img_w + spacing_px)
@@ -157,16 +172,16 @@ class SingleImageLayoutNode:
                 if (x >= margin_px and y >= margin_px and 
                     x + img_w <= canvas_width - margin_px and 
                     y + img_h <= start_y + total_img_height):
-                    canvas.paste(img, (int(x), int(y)))
+                    cells.append((x, y))
         
-        # 添加文件名（居中）
+        # 文件名位置（放不下时为 None）
+        font = None
+        text = None
         if 字体大小 > 0:
             # 加载字体
             font = self.load_font(字体, 字体大小)
             
             if font:
-                draw = ImageDraw.Draw(canvas)
-                
                 # 计算文本位置（在照片区域下方居中）
                 try:
                     # 新版本Pillow方法
@@ -176,6 +191,7 @@ class SingleImageLayoutNode:
                 except:
                     try:
                         # 旧版本方法
+                        draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
                         bbox = draw.textbbox((0, 0), 文件名, font=font)
                         text_width = bbox[2] - bbox[0]
                         text_height = bbox[3] - bbox[1]
@@ -189,10 +205,43 @@ class SingleImageLayoutNode:
                 text_y = start_y + total_img_height + cm_to_pixels(0.1, 分辨率)
                 
                 if text_x >= margin_px and text_x + text_width <= canvas_width - margin_px:
-                    # 绘制文本
-                    draw.text((text_x, text_y), 文件名, font=font, fill=(0, 0, 0))
+                    text = (text_x, text_y)
         
-        return (self.pil_to_tensor(canvas),)
+        return {
+            "canvas_width": canvas_width,
+            "canvas_height": canvas_height,
+            "margin": margin_px,
+            "img_w": img_w,
+            "img_h": img_h,
+            "cells": cells,
+            "font": font,
+            "text": text,
+        }
+
+    def layout_plan(self, layout, dpi, filename):
+        """排版方案 JSON，格式与 孤海批量自动排版 的排版方案一致（单页，单元格没有对应文件）"""
+        w, h = layout["img_w"], layout["img_h"]
+        area = max(1, (layout["canvas_width"] - 2 * layout["margin"]) * (layout["canvas_height"] - 2 * layout["margin"]))
+        utilization = round(len(layout["cells"]) * w * h / area, 4)
+        plan = {
+            "node": "SingleImageLayoutNode",
+            "canvas": {
+                "width": layout["canvas_width"],
+                "height": layout["canvas_height"],
+                "dpi": dpi,
+                "margin": layout["margin"],
+            },
+            "pages": [{
+                "page": 1,
+                "output": None,
+                "cells": [{"x": int(x), "y": int(y), "w": w, "h": h, "file": None, "label": None} for x, y in layout["cells"]],
+                "labels": [filename] if layout["text"] is not None else [],
+                "utilization": utilization,
+            }],
+            "utilization": utilization,
+            "unplaced": [],
+        }
+        return json.dumps(plan, ensure_ascii=False)
     
     def calculate_best_layout(self, width_cm, height_cm, dpi, margin_cm, spacing_cm, font_size, img_w, img_h, filename_area=0):
         # 计算原始方向布局数量
@@ -232,25 +281,6 @@ class SingleImageLayoutNode:
             rows = max_rows
         
         return cols * rows
-    
-    def tensor_to_pil(self, tensor):
-        # 将四维张量转换为三维
-        if len(tensor.shape) == 4:
-            tensor = tensor[0]
-        # 转换为0-255范围的整数
-        tensor = tensor * 255.0
-        tensor = tensor.clamp(0, 255)
-        # 转换为NumPy数组
-        array = tensor.cpu().numpy().astype(np.uint8)
-        # 创建PIL图像
-        return Image.fromarray(array)
-    
-    def pil_to_tensor(self, image):
-        # 转换为NumPy数组
-        array = np.array(image).astype(np.float32) / 255.0
-        # 转换为张量
-        tensor = torch.from_numpy(array).unsqueeze(0)
-        return tensor
 
 NODE_CLASS_MAPPINGS = {
     "SingleImageLayoutNode": SingleImageLayoutNode
@@ -2,6 +2,7 @@ import torch
 import numpy as np
 from PIL import Image, ImageDraw, ImageFilter, ImageOps
 import cv2
+from goohai_utils.tensor_convert import tensor_to_pil, pil_to_tensor, pil_to_mask, float_to_uint8
 
 class 孤海图像与遮罩描边:
     @classmethod
@@ -58,7 +59,7 @@ class 孤海图像与遮罩描边:
             mask_tensor = mask[i] if mask is not None and i < mask.shape[0] else None
             
             # 转换输入图像为PIL格式
-            image_pil = self.tensor_to_pil(img_tensor) if img_tensor is not None else None
+            image_pil = tensor_to_pil(img_tensor) if img_tensor is not None else None
             orig_size = image_pil.size if image_pil is not None else None
             
             # 处理描边颜色
@@ -69,7 +70,7 @@ class 孤海图像与遮罩描边:
                 mask_np = mask_tensor.cpu().numpy().squeeze()
                 if image_pil is not None and mask_np.shape[:2] != (img_tensor.shape[0], img_tensor.shape[1]):
                     raise ValueError(f"图像和遮罩尺寸不一致: 图像 {img_tensor.shape[:2]}, 遮罩 {mask_np.shape[:2]}")
-                mask_pil = Image.fromarray((mask_np * 255).astype(np.uint8))
+                mask_pil = Image.fromarray(float_to_uint8(mask_np))
             else:
                 mask_pil = None
             
@@ -105,12 +106,11 @@ class 孤海图像与遮罩描边:
                 result_image = Image.fromarray(mask_array.astype(np.uint8))
             
             # 转换回tensor格式
-            result_image_tensor = self.pil_to_tensor(result_image)
+            result_image_tensor = pil_to_tensor(result_image)
             result_images.append(result_image_tensor)
             
             if result_mask is not None:
-                result_mask_np = np.array(result_mask).astype(np.float32) / 255.0
-                result_masks.append(torch.tensor(result_mask_np))
+                result_masks.append(pil_to_mask(result_mask))
             else:
                 # 如果没有遮罩，创建全黑遮罩
                 result_masks.append(torch.zeros((orig_size[1], orig_size[0]), dtype=torch.float32))
@@ -143,23 +143,6 @@ class 孤海图像与遮罩描边:
         
         return stroke_layer
 
-    def tensor_to_pil(self, tensor):
-        # 将ComfyUI的tensor转换为PIL图像
-        # tensor形状: (H, W, C)
-        if tensor is None:
-            return None
-            
-        tensor = tensor.clone().detach().cpu()
-        tensor = tensor * 255
-        tensor = tensor.numpy().astype(np.uint8)
-        return Image.fromarray(tensor)
-
-    def pil_to_tensor(self, pil_image):
-        # 将PIL图像转换为ComfyUI的tensor
-        # 返回形状: (1, H, W, C)
-        img = np.array(pil_image).astype(np.float32) / 255.0
-        return torch.from_numpy(img)[None,]
-
     def hex_to_rgb(self, hex_color):
         # 将十六进制颜色转换为RGB元组
         hex_color = hex_color.lstrip('#')
@@ -1,8 +1,8 @@
-import torch
 import numpy as np
 from PIL import Image, ImageChops, ImageOps
 import cv2
 from skimage.measure import label, regionprops
+from goohai_utils.tensor_convert import tensor_to_pil, pil_to_mask
 
 class 孤海_图像差异到遮罩:
     @classmethod
@@ -25,8 +25,8 @@ class 孤海_图像差异到遮罩:
 
     def calculate_mask(self, 图像1, 图像2, 阈值, 最小区域, 填充漏洞, 遮罩扩展, 遮罩羽化):
         # 转换张量为PIL图像
-        img1 = Image.fromarray(np.clip(图像1[0].cpu().numpy()*255, 0, 255).astype(np.uint8))
-        img2 = Image.fromarray(np.clip(图像2[0].cpu().numpy()*255, 0, 255).astype(np.uint8))
+        img1 = tensor_to_pil(图像1)
+        img2 = tensor_to_pil(图像2)
 
         # 确保图像尺寸一致
         if img1.size != img2.size:
@@ -85,9 +85,7 @@ class 孤海_图像差异到遮罩:
             mask_np = cv2.GaussianBlur(mask_np, (0, 0), sigmaX=遮罩羽化)
 
         # 转换为遮罩
-        mask = Image.fromarray(mask_np).convert("L")
-        mask_tensor = torch.from_numpy(np.array(mask).astype(np.float32) / 255.0)
-        mask_tensor = mask_tensor.unsqueeze(0)
+        mask_tensor = pil_to_mask(Image.fromarray(mask_np), batch=True)
 
         return (mask_tensor,)
 
@@ -1,7 +1,8 @@
 import os
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageEnhance
-import torch
+from PIL import Image, ImageDraw, ImageEnhance
+from goohai_utils.tensor_convert import tensor_to_pil, pil_to_tensor
+from goohai_utils.font_cache import list_fonts, get_font, get_default_font
+from goohai_utils.batch_exec import batch_count, batch_item, map_batch, stack_outputs
 
 class 孤海_图像添加水印:
     def __init__(self):
@@ -15,13 +16,8 @@ class 孤海_图像添加水印:
         
     @classmethod
     def INPUT_TYPES(cls):
-        # 获取可用字体列表 - 同样修改为上级目录下的fonts文件夹
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(current_dir)
-        font_dir = os.path.join(parent_dir, "fonts")
-        font_files = []
-        if os.path.exists(font_dir):
-            font_files = [f for f in os.listdir(font_dir) if f.endswith(('.ttf', '.otf', '.ttc'))]
+        # 获取可用字体列表 - 上级目录下的fonts文件夹（目录未变化时使用缓存）
+        font_files = list_fonts(('.ttf', '.otf', '.ttc'))
         
         return {
             "required": {
@@ -53,6 +49,22 @@ class 孤海_图像添加水印:
                   水平位置, 垂直位置, X偏移百分比, Y偏移百分比,
                   文字颜色, 水印平铺, 水印角度, 水印间距, 输出透明通道,
                   水印图像=None):
+        # 逐张添加水印；水印图像批次与底图按下标对应，只有一张时对所有底图复用
+        results = map_batch(
+            lambda i: self.单张添加水印(
+                batch_item(图像, i), 水印文本, 字体, 水印大小百分比, 水印不透明度,
+                水平位置, 垂直位置, X偏移百分比, Y偏移百分比,
+                文字颜色, 水印平铺, 水印角度, 水印间距, 输出透明通道,
+                batch_item(水印图像, i),
+            ),
+            batch_count(图像),
+        )
+        return stack_outputs(results)
+
+    def 单张添加水印(self, 图像, 水印文本, 字体, 水印大小百分比, 水印不透明度,
+                    水平位置, 垂直位置, X偏移百分比, Y偏移百分比,
+                    文字颜色, 水印平铺, 水印角度, 水印间距, 输出透明通道,
+                    水印图像=None):
         # 将PyTorch张量转换为PIL图像
         img = self.张量转PIL(图像)
         
@@ -124,13 +136,13 @@ class 孤海_图像添加水印:
         原图宽, 原图高 = 原图.size
         文字大小 = int(原图高 * (大小百分比 / 100))
         
-        # 加载字体（使用修改后的上级目录路径）
+        # 加载字体（使用修改后的上级目录路径，进程内缓存）
         字体路径 = os.path.join(self.font_dir, 字体名)
         try:
-            字体 = ImageFont.truetype(字体路径, 文字大小)
+            字体 = get_font(字体路径, 文字大小)
         except:
             # 加载失败时使用默认字体
-            字体 = ImageFont.load_default()
+            字体 = get_default_font()
         
         # 获取文字大小和偏移量
         文字宽, 文字高, 偏移_y = self.获取文字大小(文字, 字体)
@@ -234,20 +246,12 @@ class 孤海_图像添加水印:
         return (r, g, b, a)
     
     def 张量转PIL(self, 张量):
-        # 将ComfyUI的张量格式转换为PIL图像
-        if len(张量.shape) == 4:
-            张量 = 张量[0]  # 取第一个图像
-        img = 张量.cpu().numpy()
-        img = np.clip(img * 255.0, 0, 255).astype(np.uint8)
-        img = Image.fromarray(img)
-        return img
+        # 将ComfyUI的张量格式转换为PIL图像（批次取第一个图像）
+        return tensor_to_pil(张量)
     
     def PIL转张量(self, img):
-        # 将PIL图像转换为ComfyUI的张量格式
-        img_np = np.array(img).astype(np.float32) / 255.0
-        if len(img_np.shape) == 3:
-            img_np = img_np[None, ...]
-        return torch.from_numpy(img_np)
+        # 将PIL图像转换为ComfyUI的张量格式（单通道图像不加批次维）
+        return pil_to_tensor(img, batch=len(img.getbands()) > 1)
 
 # 节点注册映射
 NODE_CLASS_MAPPINGS = {
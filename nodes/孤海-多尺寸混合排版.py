@@ -1,8 +1,9 @@
-import numpy as np
+import json
 import torch
-from PIL import Image, ImageDraw, ImageFont, ImageColor
+from PIL import Image, ImageDraw, ImageColor
 import comfy
-import os
+from goohai_utils.tensor_convert import tensor_to_pil, pil_to_tensor
+from goohai_utils.font_cache import list_fonts, get_font, get_default_font
 
 def convert_units(value, unit, dpi):
     if value <= 0:
@@ -14,14 +15,7 @@ def convert_units(value, unit, dpi):
     return int(round(value))
 
 def get_font_list():
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    parent_dir = os.path.dirname(current_dir)
-    font_dir = os.path.join(parent_dir, "fonts")
-    font_list = []
-    if os.path.exists(font_dir):
-        for file in os.listdir(font_dir):
-            if file.lower().endswith(('.ttf', '.otf')):
-                font_list.append(file)
+    font_list = list_fonts()
     return ["默认字体"] + font_list if font_list else ["默认字体"]
 
 class MultiSizeLayoutNode_ZH:
@@ -61,10 +55,13 @@ class MultiSizeLayoutNode_ZH:
                 "字体": (get_font_list(), {"default": "默认字体", "label": "字体"}),
                 "文字大小": ("INT", {"default": 0, "min": 0, "max": 100, "label": "文字大小"}),
                 "文字颜色": ("COLOR", {"default": "#000000", "label": "文字颜色"}),
+                # 仅规划：只计算布局，从 排版方案 输出各照片位置和文字（JSON），不裁剪、不合成图像
+                "仅规划": ("BOOLEAN", {"default": False, "label": "仅规划"}),
             },
         }
 
-    RETURN_TYPES = ("IMAGE",)
+    RETURN_TYPES = ("IMAGE", "STRING")
+    RETURN_NAMES = ("IMAGE", "排版方案")
     FUNCTION = "layout_images"
     CATEGORY = "孤海工具箱"
 
@@ -74,7 +71,9 @@ class MultiSizeLayoutNode_ZH:
         canvas_w = convert_units(kwargs["画布宽度"], unit, dpi)
         canvas_h = convert_units(kwargs["画布高度"], unit, dpi)
         
-        img = tensor2pil(kwargs["image"])
+        # 仅规划时不转换图像，各区域的图片为 None
+        plan_only = kwargs.get("仅规划", False)
+        img = None if plan_only else tensor_to_pil(kwargs["image"])
         regions = []
         self.prev_groups = []
 
@@ -99,15 +98,12 @@ class MultiSizeLayoutNode_ZH:
             
             # 加载字体
             if kwargs["字体"] != "默认字体":
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                parent_dir = os.path.dirname(current_dir)
-                font_path = os.path.join(parent_dir, "fonts", kwargs["字体"])
                 try:
-                    font = ImageFont.truetype(font_path, font_size)
+                    font = get_font(kwargs["字体"], font_size)
                 except:
-                    font = ImageFont.load_default()
+                    font = get_default_font()
             else:
-                font = ImageFont.load_default()
+                font = get_default_font()
 
             # 精确计算文字尺寸
             try:
@@ -118,15 +114,18 @@ class MultiSizeLayoutNode_ZH:
             except:
                 text_w, text_h = font.getsize(kwargs["文件名"])
 
-            # 创建透明文字图层
-            text_img = Image.new("RGBA", (text_w, text_h), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(text_img)
-            
-            # 精确文字定位
-            try:
-                draw.text((0, -bbox[1]), kwargs["文件名"], font=font, fill=text_color)
-            except:
-                draw.text((0, 0), kwargs["文件名"], font=font, fill=text_color)
+            if plan_only:
+                text_img = None
+            else:
+                # 创建透明文字图层
+                text_img = Image.new("RGBA", (text_w, text_h), (0, 0, 0, 0))
+                draw = ImageDraw.Draw(text_img)
+                
+                # 精确文字定位
+                try:
+                    draw.text((0, -bbox[1]), kwargs["文件名"], font=font, fill=text_color)
+                except:
+                    draw.text((0, 0), kwargs["文件名"], font=font, fill=text_color)
 
             # 计算文字位置
             if regions:
@@ -142,13 +141,21 @@ class MultiSizeLayoutNode_ZH:
                 text_y = spacing
 
             regions.append((text_x, text_y, text_x + text_w, text_y + text_h, text_img))
+            text_region = regions[-1]
+        else:
+            text_region = None
+
+        plan = self.layout_plan(canvas_w, canvas_h, dpi, regions, text_region, kwargs["文件名"])
+        if plan_only:
+            # 仅规划时输出 64x64 黑色占位图，下游节点仍能按 [B,H,W,C] 读取
+            return (torch.zeros((1, 64, 64, 3)), plan)
 
         # 创建最终画布并设置DPI
         canvas = self.center_all(canvas_w, canvas_h, regions)
         canvas = canvas.convert("RGB")
         canvas.info['dpi'] = (dpi, dpi)
         
-        return (pil2tensor(canvas), )
+        return (pil_to_tensor(canvas), plan)
 
     def get_group_boundary(self, regions):
         min_x = min(r[0] for r in regions)
@@ -169,16 +176,7 @@ class MultiSizeLayoutNode_ZH:
         if orig_width <= 0 or orig_height <= 0:
             return []
 
-        cropped = self.center_crop(img, orig_width, orig_height)
-        if rotate:
-            rotated = cropped.rotate(90, expand=True)
-            actual_width, actual_height = rotated.size
-        else:
-            rotated = cropped
-            actual_width, actual_height = orig_width, orig_height
-
-        if kwargs["描边宽度"] > 0:
-            self.add_stroke(rotated, stroke_width, kwargs["描边颜色"])
+        rotated, actual_width, actual_height = self.prepare_photo(img, kwargs, orig_width, orig_height, rotate)
 
         h_num = max(0, kwargs[f"水平张数{group_num}"])
         v_num = max(0, kwargs[f"垂直张数{group_num}"])
@@ -193,7 +191,7 @@ class MultiSizeLayoutNode_ZH:
                     int(y), 
                     int(x + actual_width), 
                     int(y + actual_height), 
-                    rotated.copy()
+                    self.copy_photo(rotated)
                 ))
         return positions
 
@@ -211,16 +209,7 @@ class MultiSizeLayoutNode_ZH:
         if orig_width <= 0 or orig_height <= 0 or row_col_num <= 0:
             return []
 
-        cropped = self.center_crop(img, orig_width, orig_height)
-        if rotate:
-            rotated = cropped.rotate(90, expand=True)
-            actual_width, actual_height = rotated.size
-        else:
-            rotated = cropped
-            actual_width, actual_height = orig_width, orig_height
-
-        if kwargs["描边宽度"] > 0:
-            self.add_stroke(rotated, stroke_width, kwargs["描边颜色"])
+        rotated, actual_width, actual_height = self.prepare_photo(img, kwargs, orig_width, orig_height, rotate)
 
         if not prev_groups:
             return []
@@ -251,7 +240,7 @@ class MultiSizeLayoutNode_ZH:
                             int(y),
                             int(x + actual_width),
                             int(y + actual_height),
-                            rotated.copy()
+                            self.copy_photo(rotated)
                         ))
         else:
             available_width = ref_max_x - ref_min_x
@@ -273,11 +262,33 @@ class MultiSizeLayoutNode_ZH:
                             int(y),
                             int(x + actual_width),
                             int(y + actual_height),
-                            rotated.copy()
+                            self.copy_photo(rotated)
                         ))
 
         return positions
 
+    def prepare_photo(self, img, kwargs, orig_width, orig_height, rotate):
+        """裁剪、旋转并描边一组的照片，返回 (照片, 实际宽, 实际高)；img 为 None（仅规划）时只计算尺寸"""
+        if img is None:
+            if rotate:
+                return None, orig_height, orig_width
+            return None, orig_width, orig_height
+
+        cropped = self.center_crop(img, orig_width, orig_height)
+        if rotate:
+            rotated = cropped.rotate(90, expand=True)
+            actual_width, actual_height = rotated.size
+        else:
+            rotated = cropped
+            actual_width, actual_height = orig_width, orig_height
+
+        if kwargs["描边宽度"] > 0:
+            self.add_stroke(rotated, kwargs["描边宽度"], kwargs["描边颜色"])
+        return rotated, actual_width, actual_height
+
+    def copy_photo(self, photo):
+        return None if photo is None else photo.copy()
+
     def center_crop(self, img, target_w, target_h):
         if target_w <= 0 or target_h <= 0:
             return img
@@ -308,10 +319,8 @@ class MultiSizeLayoutNode_ZH:
             width=width
         )
 
-    def center_all(self, canvas_w, canvas_h, regions):
-        if not regions:
-            return Image.new("RGB", (canvas_w, canvas_h), (255, 255, 255))
-
+    def center_offset(self, canvas_w, canvas_h, regions):
+        """整体内容在画布上居中时各区域的偏移量"""
         min_x = min(r[0] for r in regions)
         max_x = max(r[2] for r in regions)
         min_y = min(r[1] for r in regions)
@@ -321,6 +330,42 @@ class MultiSizeLayoutNode_ZH:
         content_height = max_y - min_y
         offset_x = (canvas_w - content_width) // 2 - min_x
         offset_y = (canvas_h - content_height) // 2 - min_y
+        return offset_x, offset_y
+
+    def layout_plan(self, canvas_w, canvas_h, dpi, regions, text_region, filename):
+        """排版方案 JSON，格式与 孤海批量自动排版 的排版方案一致（单页，坐标为居中后的画布坐标）"""
+        offset_x, offset_y = self.center_offset(canvas_w, canvas_h, regions) if regions else (0, 0)
+        cells, used = [], 0
+        for region in regions:
+            if region is text_region:
+                continue
+            x1, y1, x2, y2 = region[:4]
+            cells.append({
+                "x": x1 + offset_x, "y": y1 + offset_y, "w": x2 - x1, "h": y2 - y1,
+                "file": None, "label": None,
+            })
+            used += (x2 - x1) * (y2 - y1)
+        utilization = round(used / max(1, canvas_w * canvas_h), 4)
+        plan = {
+            "node": "MultiSizeLayoutNode_ZH",
+            "canvas": {"width": canvas_w, "height": canvas_h, "dpi": dpi, "margin": 0},
+            "pages": [{
+                "page": 1,
+                "output": None,
+                "cells": cells,
+                "labels": [filename] if text_region is not None else [],
+                "utilization": utilization,
+            }],
+            "utilization": utilization,
+            "unplaced": [],
+        }
+        return json.dumps(plan, ensure_ascii=False)
+
+    def center_all(self, canvas_w, canvas_h, regions):
+        if not regions:
+            return Image.new("RGB", (canvas_w, canvas_h), (255, 255, 255))
+
+        offset_x, offset_y = self.center_offset(canvas_w, canvas_h, regions)
 
         canvas = Image.new("RGB", (canvas_w, canvas_h), (255, 255, 255))
         for x1, y1, x2, y2, img in regions:
@@ -331,15 +376,6 @@ class MultiSizeLayoutNode_ZH:
 
         return canvas
 
-def tensor2pil(image):
-    if isinstance(image, torch.Tensor):
-        image = image.cpu().numpy()
-    return Image.fromarray(np.clip(255. * image[0], 0, 255).astype(np.uint8))
-
-def pil2tensor(image):
-    array = np.array(image).astype(np.float32) / 255.0
-    return torch.from_numpy(array)[None,]
-
 NODE_CLASS_MAPPINGS = {
     "MultiSizeLayoutNode_ZH": MultiSizeLayoutNode_ZH
 }
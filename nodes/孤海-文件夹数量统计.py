@@ -1,6 +1,6 @@
 import os
-import random
 import torch
+from goohai_utils.dir_index import list_dirs, tree_fingerprint
 
 class 孤海_文件夹数量统计:
     
@@ -12,19 +12,24 @@ class 孤海_文件夹数量统计:
         return {
             "required": {
                 "文件夹路径": ("STRING", {"default": ""}),
+            },
+            "optional": {
+                # 已不再需要：是否重新统计由 IS_CHANGED 的目录指纹决定，保留以兼容旧工作流
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
             }
         }
 
+    @classmethod
+    def IS_CHANGED(cls, 文件夹路径, **kwargs):
+        # 子文件夹增删、改名都会改变目录指纹
+        return tree_fingerprint(文件夹路径)
+
     RETURN_TYPES = ("INT",)
     RETURN_NAMES = ("文件夹数量",)
     FUNCTION = "统计"
     CATEGORY = "孤海工具箱"
     
-    def 统计(self, 文件夹路径, seed):
-        # 更新随机种子（即使不使用，也确保每次运行都变化）
- 
-        
+    def 统计(self, 文件夹路径, seed=0):
         # 检查路径有效性
         if not os.path.exists(文件夹路径):
             raise ValueError(f"路径不存在: {文件夹路径}")
@@ -32,11 +37,7 @@ class 孤海_文件夹数量统计:
             raise ValueError(f"路径不是文件夹: {文件夹路径}")
 
         # 统计一级子文件夹
-        文件夹数量 = 0
-        for 条目 in os.listdir(文件夹路径):
-            完整路径 = os.path.join(文件夹路径, 条目)
-            if os.path.isdir(完整路径):
-                文件夹数量 += 1
+        文件夹数量 = len(list_dirs(文件夹路径))
                 
         return (文件夹数量,)
     
@@ -1,6 +1,7 @@
 import os
 import platform
 import comfy
+from goohai_utils.dir_index import list_dirs
 
 class 孤海_文件夹索引:
     @classmethod
@@ -25,14 +26,8 @@ class 孤海_文件夹索引:
         if not os.path.isdir(文件夹路径):
             raise ValueError(f"不是有效目录: {文件夹路径}")
         
-        # 获取所有直接子目录
-        所有子目录 = []
-        for item in os.listdir(文件夹路径):
-            item_path = os.path.join(文件夹路径, item)
-            if os.path.isdir(item_path):
-                所有子目录.append(item)
-        
-        所有子目录.sort()  # 按名称排序
+        # 获取所有直接子目录（目录索引缓存，已按名称排序）
+        所有子目录 = list_dirs(文件夹路径)
         
         # 计算实际目录总数
         实际目录数 = len(所有子目录)
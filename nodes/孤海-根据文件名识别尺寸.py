@@ -1,5 +1,5 @@
-import re
 import math
+from goohai_utils.size_rules import parse_size_rules, match_size_rule
 
 class 孤海根据文件名识别尺寸:
     def __init__(self):
@@ -25,39 +25,9 @@ class 孤海根据文件名识别尺寸:
     CATEGORY = "孤海定制"
 
     def 处理(self, 文件名, 尺寸定义, 单位, 分辨率):
-        # 预处理文件名：将中文数字尺寸转换为阿拉伯数字格式
-        中文尺寸映射 = {
-            "一寸": "1寸",
-            "二寸": "2寸",
-            "两寸": "2寸",
-            "三寸": "3寸",
-            "四寸": "4寸",
-            "五寸": "5寸",
-            "六寸": "6寸",
-            "七寸": "7寸"
-        }
-        
-        # 创建预处理后的文件名（保留原始文件名不变）
-        预处理文件名 = 文件名
-        for 中文尺寸, 数字尺寸 in 中文尺寸映射.items():
-            if 中文尺寸 in 预处理文件名:
-                预处理文件名 = 预处理文件名.replace(中文尺寸, 数字尺寸)
-
-        # 改进正则表达式以处理更多情况
-        pattern = r'【(.*?)】\s*([\d.]+)\s*[xX×]\s*([\d.]+)\s*(?:[,，]\s*画布\s*[:：=]?\s*([\d.]+)\s*[xX×]\s*([\d.]+))?'
-        匹配结果 = re.findall(pattern, 尺寸定义)
-        
-        if not 匹配结果:
-            # 尝试不含画布的简化格式
-            pattern = r'【(.*?)】\s*([\d.]+)\s*[xX×]\s*([\d.]+)'
-            匹配结果 = re.findall(pattern, 尺寸定义)
-        
-        目标尺寸 = None
-        for 匹配项 in 匹配结果:
-            尺寸名 = 匹配项[0]
-            if 尺寸名 in 预处理文件名:  # 使用预处理后的文件名进行匹配
-                目标尺寸 = 匹配项
-                break
+        # 文件名中的中文数字尺寸（一寸、两寸等）在匹配时转换为阿拉伯数字格式
+        匹配结果 = parse_size_rules(尺寸定义)
+        目标尺寸 = match_size_rule(文件名, 匹配结果)
         
         if not 目标尺寸:
             return (0.0, 0.0, "未匹配", 0.0, 0.0)
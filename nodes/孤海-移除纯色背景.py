@@ -1,9 +1,10 @@
 import numpy as np
-import torch
 from PIL import Image, ImageFilter
 from collections import defaultdict
 import comfy
 from scipy.ndimage import binary_dilation
+from goohai_utils.tensor_convert import tensor_to_pil, uint8_to_tensor
+from goohai_utils.batch_exec import batch_count, batch_item, map_batch, stack_outputs
 
 class RemoveSolidBackground:
     """
@@ -51,8 +52,16 @@ class RemoveSolidBackground:
     CATEGORY = "孤海定制"
 
     def remove_background(self, image, 颜色阈值, 边缘采样密度, 移除扩展, 模糊半径):
+        # 每张图像单独检测背景色，批次内并行处理
+        results = map_batch(
+            lambda i: self.remove_single(batch_item(image, i), 颜色阈值, 边缘采样密度, 移除扩展, 模糊半径),
+            batch_count(image),
+        )
+        return stack_outputs(results)
+
+    def remove_single(self, image, 颜色阈值, 边缘采样密度, 移除扩展, 模糊半径):
         # 转换图像格式
-        image_pil = Image.fromarray((image[0].numpy() * 255).astype(np.uint8))
+        image_pil = tensor_to_pil(image)
         
         # 检测主背景色
         bg_color = self.detect_dominant_color(image_pil, 边缘采样密度)
@@ -82,16 +91,14 @@ class RemoveSolidBackground:
         
         # 更新alpha通道
         img_array[:, :, 3] = alpha
-        rgba_image = Image.fromarray(img_array)
         
-        # 转换回ComfyUI格式
-        result_image = torch.from_numpy(np.array(rgba_image).astype(np.float32) / 255.0)
+        # 转换回ComfyUI格式（直接由数组转换，省去PIL往返）
+        result_image = uint8_to_tensor(img_array)
         
         # 生成遮罩
-        mask_array = alpha.astype(np.float32) / 255.0
-        mask_tensor = torch.from_numpy(mask_array)
+        mask_tensor = uint8_to_tensor(alpha)
         
-        return (result_image.unsqueeze(0), mask_tensor.unsqueeze(0))
+        return (result_image, mask_tensor)
 
     def detect_dominant_color(self, image, sample_step):
         """改进的主色检测算法"""
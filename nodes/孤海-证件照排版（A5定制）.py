@@ -1,9 +1,9 @@
-import os
 import math
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from PIL import Image, ImageDraw, ImageOps
 import numpy as np
 import torch
 import folder_paths
+from goohai_utils.font_cache import list_fonts, get_font
 
 class GuHaiIDPhotoLayout:
     def __init__(self):
@@ -13,12 +13,7 @@ class GuHaiIDPhotoLayout:
     def INPUT_TYPES(cls):
         # 获取字体文件列表
 
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(current_dir)
-        font_dir = os.path.join(parent_dir, "fonts")
-        font_files = []
-        if os.path.exists(font_dir) and os.path.isdir(font_dir):
-            font_files = [f for f in os.listdir(font_dir) if f.lower().endswith(('.ttf', '.otf', '.ttc'))]
+        font_files = list_fonts(('.ttf', '.otf', '.ttc'))
         
         return {
             "required": {
@@ -428,10 +423,7 @@ class GuHaiIDPhotoLayout:
         if 文字大小 > 0 and 字体 and 字体 != "无可用字体":
             try:
                 # 加载字体
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                parent_dir = os.path.dirname(current_dir)
-                font_path = os.path.join(parent_dir, "fonts", 字体)
-                font_obj = ImageFont.truetype(font_path, 文字大小)
+                font_obj = get_font(字体, 文字大小)
                 
                 # 创建组合文本：文件名 + " | " + 尺寸选择
                 display_text = f"{文件名} | {尺寸选择}"
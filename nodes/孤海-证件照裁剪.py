@@ -1,7 +1,9 @@
 import numpy as np
 import torch
-from PIL import Image, ImageDraw
+from PIL import Image, ImageDraw, ImageOps
 import comfy.utils
+from goohai_utils.tensor_convert import tensor_to_pil, tensor_to_uint8, pil_to_tensor, pil_to_mask
+from goohai_utils.batch_exec import batch_count, batch_item, map_batch, stack_outputs
 
 class CropIDPhotoNode:
     @classmethod
@@ -30,6 +32,20 @@ class CropIDPhotoNode:
     CATEGORY = "孤海工具箱"
 
     def crop_photo(self, image, mask, 宽度, 高度, dpi, 头顶距离, 肩膀高度, 单位, 采样点阈值, 高低肩筛选, 参考遮罩=None):
+        # 图像、遮罩、参考遮罩按下标一一对应，批次为1的输入对每张复用
+        count = batch_count(image, mask)
+        results = map_batch(
+            lambda i: self.crop_single(
+                batch_item(image, i), batch_item(mask, i), 宽度, 高度, dpi, 头顶距离, 肩膀高度,
+                单位, 采样点阈值, 高低肩筛选, batch_item(参考遮罩, i), 统一尺寸=count > 1,
+            ),
+            count,
+        )
+        images, masks, expanded, uneven = stack_outputs(results)
+        # 布尔输出表示批次中是否有任意一张需要扩图 / 存在高低肩
+        return (images, masks, any(expanded), any(uneven))
+
+    def crop_single(self, image, mask, 宽度, 高度, dpi, 头顶距离, 肩膀高度, 单位, 采样点阈值, 高低肩筛选, 参考遮罩=None, 统一尺寸=False):
         # 单位转换
         if 单位 == "厘米":
             target_width = int(宽度 * dpi / 2.54 + 0.5)
@@ -39,21 +55,22 @@ class CropIDPhotoNode:
             target_height = int(高度)
         
         # 转换输入为numpy数组
-        i = 255. * image[0].cpu().numpy()
-        img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-        mask_arr = mask[0].cpu().numpy() * 255
-        mask_img = Image.fromarray(mask_arr.astype(np.uint8))
+        img = tensor_to_pil(image)
+        mask_np = tensor_to_uint8(mask[0])
+        mask_img = Image.fromarray(mask_np)
         
         # 获取原始尺寸
         orig_width, orig_height = img.size
         
         # 找到人像主体边界
-        mask_np = np.array(mask_img)
         y_indices, x_indices = np.where(mask_np > 128)
         if len(x_indices) == 0 or len(y_indices) == 0:
-            # 返回全黑扩图遮罩和False
+            # 没有人像：返回原图、全黑扩图遮罩和False；批次处理时原图居中裁剪缩放到目标尺寸，与其他照片尺寸一致
             black_mask = torch.zeros((1, target_height, target_width), dtype=torch.float32)
-            return (image, black_mask, False, False)
+            if not 统一尺寸:
+                return (image, black_mask, False, False)
+            fitted = ImageOps.fit(img, (target_width, target_height), Image.LANCZOS)
+            return (pil_to_tensor(fitted), black_mask, False, False)
         
         # 找到人像顶部位置
         y_min = np.min(y_indices)
@@ -188,8 +205,7 @@ class CropIDPhotoNode:
         
         # 如果有参考遮罩且有效
         if 参考遮罩 is not None:
-            ref_mask_arr = 参考遮罩[0].cpu().numpy() * 255
-            ref_mask_np = np.array(ref_mask_arr.astype(np.uint8))
+            ref_mask_np = tensor_to_uint8(参考遮罩[0])
             
             # 检查参考遮罩是否有效（非全黑非全白）
             if np.any(ref_mask_np > 128) and not np.all(ref_mask_np > 128):
@@ -322,12 +338,10 @@ class CropIDPhotoNode:
                     has_uneven_shoulders = True
         
         # 转换回ComfyUI格式
-        cropped_np = np.array(new_img).astype(np.float32) / 255.0
-        cropped_tensor = torch.from_numpy(cropped_np).unsqueeze(0)
+        cropped_tensor = pil_to_tensor(new_img)
         
         # 转换扩图遮罩
-        mask_np = np.array(expansion_mask).astype(np.float32) / 255.0
-        mask_tensor = torch.from_numpy(mask_np).unsqueeze(0)
+        mask_tensor = pil_to_mask(expansion_mask, batch=True)
         
         # 检查是否有扩展
         has_expansion = pad_left > 0 or pad_top > 0 or pad_right > 0 or pad_bottom > 0
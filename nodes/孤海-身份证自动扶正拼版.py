@@ -1,10 +1,9 @@
 import numpy as np
 import torch
 import cv2
-from PIL import Image, ImageDraw, ImageFilter, ImageOps, ImageFont
+from PIL import Image, ImageDraw, ImageFilter, ImageOps
 import math
-import os
-import glob
+from goohai_utils.font_cache import list_fonts, get_font, get_default_font
 
 def cm_to_pixels(cm, dpi=350):
     return int(cm * dpi / 2.54)
@@ -158,17 +157,13 @@ def apply_watermark(canvas, text, font_path, font_size, color, opacity, spacing,
     # 尝试加载字体
     try:
         if font_path == "默认字体":
-            font = ImageFont.load_default()
+            font = get_default_font()
         else:
-            # 获取当前脚本所在目录的上级目录
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(script_dir)
-            font_path = os.path.join(parent_dir, "fonts", font_path)
-
-            font = ImageFont.truetype(font_path, font_size)
+            # 字体文件位于插件 fonts 目录，加载结果进程内缓存
+            font = get_font(font_path, font_size)
     except Exception as e:
         print(f"加载字体失败: {e}, 使用默认字体")
-        font = ImageFont.load_default()
+        font = get_default_font()
     
     # 创建水印层
     watermark = Image.new('RGBA', canvas.size, (0, 0, 0, 0))
@@ -220,19 +215,8 @@ def apply_watermark(canvas, text, font_path, font_size, color, opacity, spacing,
 
 def get_font_list():
     """获取fonts目录下的字体文件列表"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    parent_dir = os.path.dirname(script_dir)
-    fonts_dir = os.path.join(parent_dir, "fonts")
-    
-    if not os.path.exists(fonts_dir):
-        return ["默认字体"]
-    
-    font_files = []
-    for ext in ["*.ttf", "*.otf", "*.ttc", "*.TTF", "*.OTF", "*.TTC"]:
-        font_files.extend(glob.glob(os.path.join(fonts_dir, ext)))
-    
-    # 只获取文件名
-    font_names = [os.path.basename(f) for f in font_files]
+    # 目录未变化时直接使用缓存的文件列表
+    font_names = list_fonts((".ttf", ".otf", ".ttc"))
     font_names.insert(0, "默认字体")
     return font_names
 
@@ -3,6 +3,7 @@ import numpy as np
 import cv2
 from comfy.model_management import get_torch_device
 import copy
+from goohai_utils.batch_exec import batch_count, batch_item, map_batch, stack_outputs
 
 class MaskCornerFixer:
     def __init__(self):
@@ -23,7 +24,14 @@ class MaskCornerFixer:
     DESCRIPTION = "消除遮罩圆角，保持四条边不变并还原折角"
 
     def fix_mask_corners(self, mask, trim_percent=0.15):
-        # 确保只处理批次中的第一张
+        # 兼容不带批次维的单张遮罩
+        if mask.dim() == 2:
+            mask = mask.unsqueeze(0)
+        results = map_batch(lambda i: self.fix_single(batch_item(mask, i), trim_percent), batch_count(mask))
+        return stack_outputs(results)
+
+    def fix_single(self, mask, trim_percent=0.15):
+        # 处理批次中的单张遮罩
         mask_np = mask.cpu().numpy()
         if len(mask_np.shape) == 3:
             mask_np = mask_np[0]
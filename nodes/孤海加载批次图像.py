@@ -1,8 +1,8 @@
 import os
-import torch
-import numpy as np
 from PIL import Image, ImageOps
 import folder_paths
+from goohai_utils.tensor_convert import pil_to_tensor
+from goohai_utils.dir_index import file_index, tree_fingerprint
 
 class 孤海加载批次图像:
     """ 智能图像批次加载器，支持EXIF方向校正与相对路径输出 """
@@ -51,6 +51,25 @@ class 孤海加载批次图像:
             }
         }
 
+    有效后缀 = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp'}
+
+    @classmethod
+    def IS_CHANGED(cls, 文件夹路径, 起始索引, 加载模式, 包含子文件夹, **kwargs):
+        # 递增模式每次执行都要前进一张，必须重新执行（NaN 与任何值都不相等）
+        if 加载模式 == "递增模式":
+            return float("nan")
+        # 单张模式：目录指纹 + 选中文件的大小和修改时间，图片未变化时复用上次的解码结果
+        文件夹路径 = 文件夹路径.strip()
+        指纹 = tree_fingerprint(文件夹路径, 包含子文件夹, cls.有效后缀)
+        try:
+            图片列表 = file_index(文件夹路径, 包含子文件夹, cls.有效后缀) if os.path.isdir(文件夹路径) else ()
+            if 图片列表:
+                状态 = os.stat(图片列表[起始索引 % len(图片列表)])
+                指纹 += f":{状态.st_size}:{状态.st_mtime_ns}"
+        except OSError:
+            pass
+        return 指纹
+
     RETURN_TYPES = ("IMAGE", "STRING", "STRING", "STRING", "STRING", "INT")
     RETURN_NAMES = ("图像", "文件名", "图像路径", "扩展名", "路径+文件名", "序号")
     FUNCTION = "加载图片"
@@ -93,7 +112,7 @@ class 孤海加载批次图像:
         图像对象 = ImageOps.exif_transpose(图像对象)
         # 转换为指定通道模式
         图像对象 = 图像对象.convert("RGBA" if 保留透明通道 else "RGB")
-        图像张量 = torch.from_numpy(np.array(图像对象).astype(np.float32) / 255.0)[None,]
+        图像张量 = pil_to_tensor(图像对象)
         
         # 路径处理
         基础路径 = os.path.normpath(文件夹路径)
@@ -114,17 +133,11 @@ class 孤海加载批次图像:
         return (图像张量, 文件名, os.path.dirname(选中路径), 最终扩展名, 相对路径, 序号)
 
     def 遍历目录(self, 路径, 包含子目录):
-        有效后缀 = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp'}
-        文件列表 = []
-        if os.path.isdir(路径):
-            walk_method = os.walk(路径) if 包含子目录 else [next(os.walk(路径))]
-            for 根目录, _, 文件 in walk_method:
-                文件列表.extend(
-                    os.path.join(根目录, f)
-                    for f in 文件
-                    if os.path.splitext(f)[-1].lower() in 有效后缀
-                )
-        return sorted(文件列表)
+        if not os.path.isdir(路径):
+            return ()
+        # 目录索引按各级目录 mtime 增量刷新，结果已按完整路径排序；
+        # 返回共享的只读元组，递增模式逐张遍历大目录时每次执行只需 stat 各级目录，按下标取文件为 O(1)
+        return file_index(路径, 包含子目录, self.有效后缀)
 
 NODE_CLASS_MAPPINGS = {"GuHai_ImageLoaderPro": 孤海加载批次图像}
 NODE_DISPLAY_NAME_MAPPINGS = {"GuHai_ImageLoaderPro": "孤海-加载批次图像"}
\ No newline at end of file
@@ -1,7 +1,6 @@
 from PIL import Image, ImageOps, ImageDraw
-import numpy as np
-import torch
 import comfy.utils
+from goohai_utils.tensor_convert import tensor_to_pil, pil_to_tensor, pil_to_mask, mask_to_pil
 
 class 孤海图像缩放按像素:
     @classmethod
@@ -32,12 +31,12 @@ class 孤海图像缩放按像素:
     CATEGORY = "孤海工具箱"
 
     def 执行缩放(self, 图像, 缩放方法, 宽度, 高度, 将边缩放到, 缩放插值, 缩放模式, 执行条件, 启用填充色, 填充颜色, 自适应旋转, 整除数, 遮罩=None):
-        img = tensor2pil(图像)
+        img = tensor_to_pil(图像)
         原宽度, 原高度 = img.size
         
         # 处理输入遮罩
         if 遮罩 is not None:
-            mask_pil = tensor2mask(遮罩)
+            mask_pil = mask_to_pil(遮罩)
             if mask_pil.size != (原宽度, 原高度):
                 mask_pil = mask_pil.resize((原宽度, 原高度), Image.NEAREST)
         else:
@@ -147,9 +146,9 @@ class 孤海图像缩放按像素:
                     扩展遮罩 = 扩展遮罩.crop((左边, 顶边, 右边, 底边))
                     新宽度, 新高度 = 整除宽度, 整除高度
 
-        img_tensor = pil2tensor(img)
-        mask_tensor = pil2mask(mask_pil)
-        扩展遮罩_tensor = pil2mask(扩展遮罩)
+        img_tensor = pil_to_tensor(img)
+        mask_tensor = pil_to_mask(mask_pil, batch=True)
+        扩展遮罩_tensor = pil_to_mask(扩展遮罩, batch=True)
 
         return (img_tensor, 新宽度, 新高度, mask_tensor, 扩展遮罩_tensor, 布尔)
 
@@ -243,17 +242,5 @@ class 孤海图像缩放按像素:
         }
         return 插值映射.get(插值名称, Image.LANCZOS)
 
-def tensor2pil(image):
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-def tensor2mask(mask):
-    return Image.fromarray(np.clip(255. * mask.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-def pil2tensor(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
-
-def pil2mask(image):
-    return torch.from_numpy(np.array(image.convert("L")).astype(np.float32) / 255.0).unsqueeze(0)
-
 NODE_CLASS_MAPPINGS = {"孤海图像缩放按像素": 孤海图像缩放按像素}
 NODE_DISPLAY_NAME_MAPPINGS = {"孤海图像缩放按像素": "孤海图像缩放按像素"}
\ No newline at end of file
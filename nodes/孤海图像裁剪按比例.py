@@ -1,9 +1,9 @@
 import torch
-import numpy as np
 import math
 from PIL import Image, ImageOps
 from nodes import MAX_RESOLUTION
 import folder_paths
+from goohai_utils.tensor_convert import tensor_to_pil, pil_to_tensor, mask_to_pil, pil_to_mask
 
 class 孤海图像裁剪按比例:
     @classmethod
@@ -40,7 +40,7 @@ class 孤海图像裁剪按比例:
         }
         插值 = 插值映射[缩放插值]
         
-        img = tensor2pil(图像)
+        img = tensor_to_pil(图像)
         original_w, original_h = img.size
         rotated = False
 
@@ -119,7 +119,7 @@ class 孤海图像裁剪按比例:
 
         # 处理输入遮罩
         if 遮罩 is not None:
-            mask_pil = mask2pil(遮罩)
+            mask_pil = mask_to_pil(遮罩)
             if rotated:
                 mask_pil = mask_pil.rotate(90, expand=True)
             if 缩放模式 == "裁剪":
@@ -135,23 +135,11 @@ class 孤海图像裁剪按比例:
                 mask_pil = ImageOps.expand(mask_pil, 
                     (pad_w//2, pad_h//2, pad_w-pad_w//2, pad_h-pad_h//2), 
                     fill=0)
-            output_mask = pil2mask(mask_pil)
+            output_mask = pil_to_mask(mask_pil)
         else:
             output_mask = torch.zeros((new_h, new_w), dtype=torch.float32)
 
-        return (pil2tensor(img), new_w, new_h, output_mask.unsqueeze(0), mask.unsqueeze(0), 填充区域)
-
-def tensor2pil(image):
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-def pil2tensor(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
-
-def mask2pil(mask):
-    return Image.fromarray(np.clip(255. * mask.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-def pil2mask(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0)
+        return (pil_to_tensor(img), new_w, new_h, output_mask.unsqueeze(0), mask.unsqueeze(0), 填充区域)
 
 NODE_CLASS_MAPPINGS = {
     "孤海图像裁剪按比例": 孤海图像裁剪按比例
@@ -1,7 +1,8 @@
 import numpy as np
-import torch
 from PIL import Image, ImageDraw
 import cv2
+from goohai_utils.tensor_convert import tensor_to_uint8, pil_to_tensor
+from goohai_utils.batch_exec import batch_count, batch_item, map_batch, stack_outputs
 
 class GuHaiPNGAutoMask:
     def __init__(self):
@@ -21,24 +22,31 @@ class GuHaiPNGAutoMask:
     CATEGORY = "孤海工具箱"
     TITLE = "孤海定制-PNG自动套图"
     
+    # 扩展像素数
+    EXPANSION_PIXELS = 2
+    # 最小透明区域像素面积阈值
+    MIN_AREA_THRESHOLD = 50
+    
     def process_images(self, template_image, portrait_image):
-        # 扩展像素数
-        EXPANSION_PIXELS = 2
-        # 最小透明区域像素面积阈值
-        MIN_AREA_THRESHOLD = 50
+        # 每张模板只检测一次透明区域，模板或人像批次为1时对另一方的每张复用
+        templates = map_batch(
+            lambda i: self.analyze_template(batch_item(template_image, i)),
+            batch_count(template_image),
+        )
+        results = map_batch(
+            lambda i: self.compose_single(templates[i % len(templates)], batch_item(portrait_image, i)),
+            batch_count(template_image, portrait_image),
+        )
+        return stack_outputs(results)
+    
+    def analyze_template(self, template_image):
+        EXPANSION_PIXELS = self.EXPANSION_PIXELS
+        MIN_AREA_THRESHOLD = self.MIN_AREA_THRESHOLD
         
-        # 将输入的tensor转换为PIL图像
         # 转换模板图(RGBA)
-        template_np = (template_image[0].cpu().numpy() * 255).astype(np.uint8)
+        template_np = tensor_to_uint8(template_image[0])
         template_pil = Image.fromarray(template_np, mode='RGBA')
         
-        # 转换人像图(RGB转RGBA)
-        portrait_np = (portrait_image[0].cpu().numpy() * 255).astype(np.uint8)
-        if portrait_np.shape[-1] == 3:
-            portrait_pil = Image.fromarray(portrait_np, mode='RGB').convert('RGBA')
-        else:
-            portrait_pil = Image.fromarray(portrait_np, mode='RGBA')
-        
         # 提取模板图的alpha通道
         alpha = template_pil.split()[-1]
         alpha_np = np.array(alpha)
@@ -88,6 +96,40 @@ class GuHaiPNGAutoMask:
         # 计算轮廓的边界框，确定透明区域的范围
         x, y, w, h = cv2.boundingRect(max_contour)
         
+        # 创建内部透明区域的掩码，并扩展2个像素
+        mask = Image.new('L', template_pil.size, 0)
+        draw = ImageDraw.Draw(mask)
+        
+        # 将轮廓转换为适合PIL的格式
+        contour_points = [(point[0][0], point[0][1]) for point in max_contour]
+        
+        # 转换轮廓为适合OpenCV处理的格式
+        contour_np = np.array(contour_points, dtype=np.int32).reshape((-1, 1, 2))
+        
+        # 创建原始掩码
+        mask_np = np.zeros(alpha_np.shape, dtype=np.uint8)
+        cv2.fillPoly(mask_np, [contour_np], 255)
+        
+        # 扩展掩码边界2个像素
+        kernel = np.ones((2*EXPANSION_PIXELS + 1, 2*EXPANSION_PIXELS + 1), np.uint8)
+        expanded_mask_np = cv2.dilate(mask_np, kernel, iterations=1)
+        
+        # 转换回PIL图像
+        expanded_mask = Image.fromarray(expanded_mask_np)
+        
+        return template_pil, (x, y, w, h), expanded_mask
+    
+    def compose_single(self, template, portrait_image):
+        EXPANSION_PIXELS = self.EXPANSION_PIXELS
+        template_pil, (x, y, w, h), expanded_mask = template
+        
+        # 转换人像图(RGB转RGBA)
+        portrait_np = tensor_to_uint8(portrait_image[0])
+        if portrait_np.shape[-1] == 3:
+            portrait_pil = Image.fromarray(portrait_np, mode='RGB').convert('RGBA')
+        else:
+            portrait_pil = Image.fromarray(portrait_np, mode='RGBA')
+        
         # 计算内部透明区域的中心点
         center_x = x + w // 2
         center_y = y + h // 2
@@ -130,27 +172,6 @@ class GuHaiPNGAutoMask:
         # 将缩放后的人像图粘贴到中间层
         temp_image.paste(resized_portrait, (paste_x, paste_y))
         
-        # 创建内部透明区域的掩码，并扩展2个像素
-        mask = Image.new('L', template_pil.size, 0)
-        draw = ImageDraw.Draw(mask)
-        
-        # 将轮廓转换为适合PIL的格式
-        contour_points = [(point[0][0], point[0][1]) for point in max_contour]
-        
-        # 转换轮廓为适合OpenCV处理的格式
-        contour_np = np.array(contour_points, dtype=np.int32).reshape((-1, 1, 2))
-        
-        # 创建原始掩码
-        mask_np = np.zeros(alpha_np.shape, dtype=np.uint8)
-        cv2.fillPoly(mask_np, [contour_np], 255)
-        
-        # 扩展掩码边界2个像素
-        kernel = np.ones((2*EXPANSION_PIXELS + 1, 2*EXPANSION_PIXELS + 1), np.uint8)
-        expanded_mask_np = cv2.dilate(mask_np, kernel, iterations=1)
-        
-        # 转换回PIL图像
-        expanded_mask = Image.fromarray(expanded_mask_np)
-        
         # 将人像图限制在扩展后的掩码区域内
         temp_image.putalpha(expanded_mask)
         
@@ -163,8 +184,7 @@ class GuHaiPNGAutoMask:
         result.paste(template_pil, (0, 0), mask=template_pil.split()[-1])
         
         # 转换回tensor格式
-        result_np = np.array(result).astype(np.float32) / 255.0
-        result_tensor = torch.from_numpy(result_np).unsqueeze(0)
+        result_tensor = pil_to_tensor(result)
         
         return (result_tensor,)
 
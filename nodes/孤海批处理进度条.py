@@ -1,11 +1,11 @@
-import os
 import sys
 import math
 import numpy as np  # 新增导入
 import torch  # 新增导入
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import comfy
 import folder_paths
+from goohai_utils.font_cache import list_fonts, get_font, get_default_font
 
 class GuhaiBatchProgress:
     """
@@ -14,16 +14,8 @@ class GuhaiBatchProgress:
     """
     @classmethod
     def INPUT_TYPES(cls):
-        # 获取字体目录
-
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(current_dir)
-        font_dir = os.path.join(parent_dir, "fonts")
-        fonts = []
-        if os.path.exists(font_dir):
-            for f in os.listdir(font_dir):
-                if f.lower().endswith(('.ttf', '.otf')):
-                    fonts.append(f)
+        # 获取字体目录下的字体（目录未变化时直接使用缓存）
+        fonts = list_fonts()
         
         return {
             "required": {
@@ -59,23 +51,15 @@ class GuhaiBatchProgress:
 
         # 处理文字
         text = f"{min(current, total)}/{total}"
-        font_path = None
         
-        # 加载字体
-        if font_name != "default" and font_name:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(current_dir)
-            font_path = os.path.join(parent_dir, "fonts", font_name)        
-
+        # 加载字体（进程级缓存，批量运行时不再重复解析字体文件）
         try:
-            if font_path and os.path.exists(font_path):
-                font = ImageFont.truetype(font_path, font_size)
+            if font_name != "default" and font_name:
+                font = get_font(font_name, font_size)
             else:
-                font = ImageFont.load_default()
-                font = font.font_variant(size=font_size)
+                font = get_default_font(font_size)
         except:
-            font = ImageFont.load_default()
-            font = font.font_variant(size=font_size)
+            font = get_default_font(font_size)
 
         # 计算文字位置
         text_bbox = draw.textbbox((0, 0), text, font=font)
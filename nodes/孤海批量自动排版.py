@@ -1,10 +1,26 @@
 import os
+import re
 import math
-import torch
+import json
+import tempfile
+from collections import deque
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+import torch
+from PIL import Image, ImageDraw, ImageOps
 import comfy
 import folder_paths
+from goohai_utils.tensor_convert import pils_to_tensor
+from goohai_utils.font_cache import list_fonts, get_font, get_default_font, char_width, text_width, text_mask
+from goohai_utils.worker_pool import submit_ordered
+from goohai_utils.dir_index import walk_files
+from goohai_utils.image_io import open_reduced
+from goohai_utils.background_writer import BackgroundWriter
+from goohai_utils.rect_pack import pack_rects
+from goohai_utils.cell_cache import cell_key, get_cell, put_cell
+from goohai_utils.page_document import PageDocumentWriter, DOCUMENT_FORMATS
+from goohai_utils.strip_writer import StripPNGWriter, StripTIFFWriter
+from goohai_utils.size_rules import parse_size_rules, match_size_rule, parse_size
+from goohai_utils.node_worker import run_in_processes
 
 def convert_unit(value, unit, dpi):
     if unit == "厘米":
@@ -19,12 +35,7 @@ class GH_BatchLayout:
 
     @classmethod
     def INPUT_TYPES(cls):
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(current_dir)
-        font_dir = os.path.join(parent_dir, "fonts")
-        fonts = ["默认"]
-        if os.path.exists(font_dir):
-            fonts += [f for f in os.listdir(font_dir) if f.lower().endswith(('.ttf', '.otf'))]
+        fonts = ["默认"] + list_fonts()
         
         return {
             "required": {
@@ -32,7 +43,8 @@ class GH_BatchLayout:
                 "输出文件夹路径": ("STRING", {"default": "", "folder": True}),
                 "图片格式筛选": (["所有图片", "JPG/JPEG", "PNG", "BMP", "GIF", "TIF/TIFF", "WEBP"], {"default": "所有图片"}),
                 "输出文件名": ("STRING", {"default": "孤海排版"}),              
-                "保存格式": (["JPG", "PNG"], {"default": "JPG"}),
+                # PDF / TIFF 把整个任务的各页依次追加到一个多页文件中
+                "保存格式": (["JPG", "PNG", "PDF", "TIFF"], {"default": "JPG"}),
                 "开启批处理": ("BOOLEAN", {"default": True}),
                 "包含子文件夹": ("BOOLEAN", {"default": False}),
                 "单位": (["像素", "厘米", "英寸"], {"default": "厘米"}),
@@ -56,66 +68,404 @@ class GH_BatchLayout:
                 "字体颜色": ("COLOR", {"default": "#000000"}),
                 "字体大小": ("INT", {"default": 24, "min": 5, "max": 150}),
                 "安全边距": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 200.0, "step": 0.1}),  # 新增安全边距参数
+                # 流水线预读：当前页合成保存时，提前解码并处理后面几页的图片（0 为不预读，越大占用内存越多）
+                "预读页数": ("INT", {"default": 1, "min": 0, "max": 8}),
+                # 按单元格尺寸缩小解码（JPEG 草稿解码），大图解码更快、占用内存更少
+                "快速解码": ("BOOLEAN", {"default": True}),
+                # 多进程渲染：页面分给多个子进程同时合成保存（0 或 1 为在当前进程中渲染；每个子进程启动需要数秒，页数多时才划算）
+                "渲染进程数": ("INT", {"default": 0, "min": 0, "max": 32}),
+                # 续排模式：只排版输出文件夹排版清单中没有记录（或已被修改）的图片，编号接着已有版面继续
+                "续排模式": ("BOOLEAN", {"default": False}),
+                # 预览输出：第一页为原尺寸；全部页缩略图把每一页缩小到 预览最长边 后作为一个批次输出
+                "预览输出": (["第一页", "全部页缩略图"], {"default": "第一页"}),
+                "预览最长边": ("INT", {"default": 1024, "min": 64, "max": 8192, "step": 64}),
+                # 混合尺寸：每张图片按文件名中的尺寸名（或输入文件夹中的 尺寸清单.txt）确定尺寸，装箱排版以减少版面数；
+                # 未匹配的图片使用 照片宽度 / 照片高度。尺寸规则格式同 孤海-根据文件名识别尺寸，单位为厘米
+                "排版模式": (["统一尺寸", "混合尺寸"], {"default": "统一尺寸"}),
+                "尺寸规则": ("STRING", {"multiline": True, "default": "【1寸】2.5x3.5\n【2寸】3.5x4.9\n【护照】3.3x4.8"}),
+                # 单元格缓存：只改画布、间距、文件名显示等重新排版时，复用处理好的单元格（磁盘缓存重启后仍有效）
+                "单元格缓存": (["关闭", "内存", "内存+磁盘"], {"default": "内存"}),
+                # 分带渲染：大幅面画布按该行数的水平条带合成并直接写盘，不在内存中生成整页（仅 PNG、TIFF；0 为整页合成）
+                "分带行数": ("INT", {"default": 0, "min": 0, "max": 8192, "step": 64}),
+                # 仅规划：只扫描文件、计算布局，从 排版方案 输出各版面的单元格位置、文件和文字（JSON），不解码、不合成、不写盘
+                "仅规划": ("BOOLEAN", {"default": False}),
+                # 按方案渲染时只渲染这些页（从 1 开始，如 "1-20,25"；留空为全部页）
+                "渲染页码": ("STRING", {"default": ""}),
+            },
+            "optional": {
+                # 接入 排版方案 时按方案渲染：页面划分和输出编号都取自方案，不再扫描输入、输出文件夹，
+                # 多个 ComfyUI 实例或工作进程可以分别渲染同一方案的不同页码段，输出文件名不会冲突
+                "排版方案": ("STRING", {"forceInput": True}),
             }
         }
 
-    RETURN_TYPES = ("IMAGE", "STRING")
-    RETURN_NAMES = ("图像", "完成报告")
+    RETURN_TYPES = ("IMAGE", "STRING", "STRING")
+    RETURN_NAMES = ("图像", "完成报告", "排版方案")
     FUNCTION = "process"
     CATEGORY = "孤海工具箱"
 
     def process(self, **kwargs):
         参数 = self.预处理参数(kwargs)
+        if 参数.get("排版方案", "").strip() and not 参数.get("仅规划", False):
+            return self.按方案渲染(kwargs, 参数)
         file_list = self.获取文件列表(参数["输入文件夹路径"], 参数["包含子文件夹"], 参数["图片格式筛选"])
         
         if not file_list:
             raise ValueError("未找到任何有效图片文件")
 
-        布局参数 = self.计算布局参数(参数, len(file_list))
+        # 排版清单：记录每张输入图片（路径、大小、修改时间）排在哪个版面，续排模式据此跳过已排版的图片
+        清单 = 签名 = None
+        续排说明 = ""
+        if 参数.get("续排模式", False):
+            清单 = self.读取全部清单(参数)
+            签名 = self.文件签名(file_list)
+            全部数量 = len(file_list)
+            file_list = [
+                item for item in file_list
+                if not self.已排版(清单.get(os.path.abspath(item[1])), 签名.get(os.path.abspath(item[1])))
+            ]
+            if not file_list:
+                # 没有需要排版的图片时同样输出 64x64 占位图
+                return (
+                    torch.zeros((1, 64, 64, 3)),
+                    f"续排模式：{全部数量}张图片均已排版，没有需要排版的新图片。",
+                    self.排版方案(参数, {"总页数": 0, "每页数量": 0, "text_height": 0}, [], 1),
+                )
+            续排说明 = f"续排模式：跳过{全部数量 - len(file_list)}张已排版图片，\n"
+
+        # 页面内容：每页的图片列表；统一尺寸为 (相对路径, 绝对路径)，混合尺寸另带单元格位置和尺寸
+        if 参数.get("排版模式", "统一尺寸") == "混合尺寸":
+            布局参数, 页面内容, 装箱说明 = self.计算混合布局(参数, file_list)
+            if not 页面内容:
+                raise ValueError("所有图片的尺寸都超过了画布可用区域，无法排版" + 装箱说明)
+        else:
+            布局参数 = self.计算布局参数(参数, len(file_list))
+            
+            if not 参数["开启批处理"]:
+                布局参数["总页数"] = 1
+                布局参数["每页数量"] = min(布局参数["每页数量"], len(file_list))
+                file_list = file_list[:布局参数["每页数量"]]
+            每页数量 = 布局参数["每页数量"]
+            页面内容 = [file_list[page*每页数量 : (page+1)*每页数量] for page in range(布局参数["总页数"])]
+            装箱说明 = f"\n每版{每页数量}张图片。"
+
+        if os.path.isdir(参数["输出文件夹路径"]):
+            start_num = self.获取起始编号(参数["输出文件夹路径"], 参数["输出文件名"], 参数["保存格式"])
+        else:
+            # 仅规划时不创建输出文件夹
+            start_num = 1
         
-        if not 参数["开启批处理"]:
-            布局参数["总页数"] = 1
-            布局参数["每页数量"] = min(布局参数["每页数量"], len(file_list))
-            file_list = file_list[:布局参数["每页数量"]]
+        processed_count = sum(len(items) for items in 页面内容)
+        report = 续排说明 + f"共处理{processed_count}张图片，\n排了{布局参数['总页数']}个版面，" + 装箱说明
+        方案 = self.排版方案(参数, 布局参数, 页面内容, start_num)
+        if 参数.get("仅规划", False):
+            # 仅规划时输出 64x64 黑色占位图，下游节点仍能按 [B,H,W,C] 读取
+            return (torch.zeros((1, 64, 64, 3)), "仅规划：" + report, 方案)
+
+        if 清单 is None:
+            # 非续排时只读取实际渲染的页面中图片的签名，不逐个 stat 整个输入文件夹
+            清单 = self.读取全部清单(参数)
+            签名 = self.文件签名([item[:2] for items in 页面内容 for item in items])
+        report, 预览图 = self.渲染并记录(kwargs, 参数, 布局参数, 页面内容, range(布局参数["总页数"]), start_num, report, 签名, 清单, self.清单路径(参数))
 
-        result_tensors = []
-        start_num = self.获取起始编号(参数["输出文件夹路径"], 参数["输出文件名"], 参数["保存格式"])
+        # 如果没有任何排版图像，返回空张量
+        if not 预览图:
+            return (torch.zeros(0), report, 方案)
         
-        processed_count = 布局参数["总页数"] * 布局参数["每页数量"]
-        report = f"共处理{min(len(file_list), processed_count)}张图片，\n排了{布局参数['总页数']}个版面，\n每版{布局参数['每页数量']}张图片。"
+        return (pils_to_tensor(预览图), report, 方案)
 
-        first_canvas = None  # 用于存储第一张排版图像
+    def 按方案渲染(self, raw_params, 参数):
+        # 按 排版方案 渲染 渲染页码 中的各页：页面、单元格、输出编号都取自方案，不扫描输入、输出文件夹，
+        # 同一方案的不同页码段可以由多个实例同时渲染
+        try:
+            方案 = json.loads(参数["排版方案"])
+        except ValueError as e:
+            raise ValueError(f"排版方案不是有效的 JSON: {str(e)}")
+        if 方案.get("node") != "GH_BatchLayout" or "layout" not in 方案:
+            raise ValueError("排版方案不是 孤海批量自动排版 生成的方案")
+        当前 = {
+            "画布尺寸": (参数["画布宽度_px"], 参数["画布高度_px"]),
+            "分辨率": 参数["分辨率"],
+            "排版模式": 参数.get("排版模式", "统一尺寸"),
+            "保存格式": 参数["保存格式"],
+            "输出文件名": 参数["输出文件名"],
+        }
+        规划时 = {
+            "画布尺寸": (方案["canvas"]["width"], 方案["canvas"]["height"]),
+            "分辨率": 方案["canvas"]["dpi"],
+            "排版模式": 方案["mode"],
+            "保存格式": 方案["format"],
+            "输出文件名": 方案["output_name"],
+        }
+        不一致 = [name for name in 当前 if 当前[name] != 规划时[name]]
+        if 不一致:
+            raise ValueError("排版方案与当前参数不一致：" + "、".join(不一致))
+
+        总页数 = len(方案["pages"])
+        pages = self.解析页码(参数.get("渲染页码", ""), 总页数)
+        if not pages:
+            return (torch.zeros((1, 64, 64, 3)), "排版方案中没有需要渲染的版面。", 参数["排版方案"])
+        分段渲染 = len(pages) < 总页数
+        if 分段渲染 and 参数["保存格式"] in DOCUMENT_FORMATS:
+            raise ValueError(f"保存格式为{参数['保存格式']}时整个任务写入一个文件，不能只渲染部分页")
+
+        # 单元格还原为 渲染页面 使用的页面内容
+        mixed = 方案["mode"] == "混合尺寸"
+        页面内容 = []
+        for page in pages:
+            items = []
+            for cell in 方案["pages"][page]["cells"]:
+                abs_path = os.path.join(参数["输入文件夹路径"], cell["file"])
+                if mixed:
+                    items.append((cell["file"], abs_path, cell["x"], cell["y"], cell["w"], cell["h"]))
+                else:
+                    items.append((cell["file"], abs_path))
+            页面内容.append(items)
+        布局参数 = dict(方案["layout"])
+        start_num = 方案["first_number"]
+        参数["预览页码"] = pages[0]
+        raw_params = dict(raw_params, 预览页码=pages[0])
+
+        页码段 = self.页码段名称(pages) if 分段渲染 else None
+        清单路径 = self.清单路径(参数, 页码段)
+        清单 = self.读取清单(清单路径)
+        签名 = self.文件签名([item[:2] for items in 页面内容 for item in items])
+
+        processed_count = sum(len(items) for items in 页面内容)
+        report = f"按排版方案渲染：共{总页数}个版面，本次渲染{len(pages)}个版面（{self.页码段名称(pages)}），共{processed_count}张图片。"
+        report, 预览图 = self.渲染并记录(raw_params, 参数, 布局参数, 页面内容, pages, start_num, report, 签名, 清单, 清单路径)
+        if not 预览图:
+            return (torch.zeros(0), report, 参数["排版方案"])
+        return (pils_to_tensor(预览图), report, 参数["排版方案"])
+
+    def 解析页码(self, text, 总页数):
+        # "1-20,25" → 从 0 开始的页码列表（升序、去重）；留空为全部页
+        if not text.strip():
+            return list(range(总页数))
+        pages = set()
+        for part in re.split(r"[,，\s]+", text.strip()):
+            if not part:
+                continue
+            match = re.fullmatch(r"(\d+)(?:\s*[-~]\s*(\d+))?", part)
+            if not match:
+                raise ValueError(f"渲染页码格式不正确: {part}")
+            first = int(match.group(1))
+            last = int(match.group(2) or first)
+            if first < 1 or last < first or last > 总页数:
+                raise ValueError(f"渲染页码超出范围（共{总页数}页）: {part}")
+            pages.update(range(first - 1, last))
+        return sorted(pages)
+
+    def 页码段名称(self, pages):
+        # 连续页码合并，如 [0,1,2,5] → "p1-3_p6"
+        段 = []
+        for page in pages:
+            if 段 and 段[-1][1] == page - 1:
+                段[-1][1] = page
+            else:
+                段.append([page, page])
+        return "_".join(f"p{a + 1}" if a == b else f"p{a + 1}-{b + 1}" for a, b in 段)
+
+    def 渲染并记录(self, raw_params, 参数, 布局参数, 页面内容, pages, start_num, report, 签名, 清单, 清单路径):
+        # 渲染 pages 中的各页（页面内容 与 pages 一一对应），保存错误写入报告，成功的版面记入排版清单；
+        # 返回 (报告, 预览图列表)
+        pages = list(pages)
+        进程数 = min(参数.get("渲染进程数", 0), len(pages))
+        if 进程数 > 1 and 参数["保存格式"] in DOCUMENT_FORMATS:
+            # 多页文档只能按页顺序追加到同一个文件，不能分给多个进程
+            print(f"【孤海工具箱】保存格式为{参数['保存格式']}时在当前进程中渲染")
+            进程数 = 1
+        if 进程数 > 1:
+            预览图, 保存错误 = self.多进程渲染(raw_params, 布局参数, 页面内容, pages, start_num, 进程数)
+        else:
+            预览图, 保存错误 = self.渲染页面(参数, 布局参数, 页面内容, pages, start_num)
+
+        if 保存错误:
+            report += f"\n有{len(保存错误)}个版面保存失败："
+            for name, e in 保存错误:
+                report += f"\n{name} - {e}"
+
+        # 保存失败的版面（或整个多页文档写出失败）不记入清单，下次续排时重新排版
+        失败版面 = {name for name, _ in 保存错误}
+        for page, items in zip(pages, 页面内容):
+            page_name = self.页面文件名(参数, start_num, page)
+            if page_name in 失败版面 or page_name.split("#")[0] in 失败版面:
+                continue
+            for item in items:
+                key = os.path.abspath(item[1])
+                if key in 签名:
+                    size, mtime_ns = 签名[key]
+                    清单[key] = {"size": size, "mtime_ns": mtime_ns, "page": page_name}
+        try:
+            self.写入清单(清单路径, 清单)
+        except OSError as e:
+            report += f"\n排版清单保存失败: {str(e)}"
+        return report, 预览图
+
+    def 渲染页面(self, 参数, 布局参数, 页面内容, pages, start_num):
+        # 合成并保存 pages 中的各页，页面内容 与 pages 一一对应；
+        # 返回 (按页码排列的预览图列表, [(文件名, 错误信息)])
+        pages = list(pages)
+        预览图 = []
         
-        for page in range(布局参数["总页数"]):
-            current_files = file_list[
-                page*布局参数["每页数量"] : (page+1)*布局参数["每页数量"]
-            ]
-            images = self.加载当前页图片(current_files)
-            
-            # 判断是否是最后一页且图片不足一页
-            is_last_page = (page == 布局参数["总页数"] - 1)
-            is_full_page = len(images) == 布局参数["每页数量"]
-            
-            canvas = self.生成画布(images, 布局参数, 参数, is_last_page and not is_full_page)
-            
-            output_path = os.path.join(
-                参数["输出文件夹路径"], 
-                f"{参数['输出文件名']}_{start_num + page:02d}.{参数['保存格式'].lower()}"
+        # 流水线：各页图片的解码和单元格处理提交到共享线程池，
+        # 当前页合成、保存期间后面最多 预读页数 页已在并行准备，预读深度限制了内存占用
+        预读页数 = max(0, 参数.get("预读页数", 1))
+        预读队列 = deque()
+        已提交页数 = 0
+        # 编码和写盘交给后台线程，与下一页的合成重叠；最多积压 2 页，限制内存占用
+        # 分带渲染时画布按条带合成，写出线程中积压的是条带，峰值内存与条带大小相当
+        分带行数 = 参数.get("分带行数", 0) if 参数["保存格式"] in ("PNG", "TIFF") else 0
+        文档 = None
+        if 分带行数 > 0:
+            if 参数["保存格式"] == "TIFF":
+                文档 = StripTIFFWriter(
+                    os.path.join(参数["输出文件夹路径"], self.页面文件名(参数, start_num, 0).split("#")[0]),
+                    参数["分辨率"],
+                )
+            写出线程 = BackgroundWriter(self.执行写出, max_pending=2)
+        elif 参数["保存格式"] in DOCUMENT_FORMATS:
+            文档 = self.打开文档(参数, start_num)
+            写出线程 = BackgroundWriter(self.写入文档页, max_pending=2)
+        else:
+            写出线程 = BackgroundWriter(self.保存画布, max_pending=2)
+        try:
+            for index, page in enumerate(pages):
+                while 已提交页数 < len(pages) and 已提交页数 <= index + 预读页数:
+                    预读队列.append(self.提交页面(页面内容[已提交页数], 参数))
+                    已提交页数 += 1
+                cells = 预读队列.popleft().result()
+                
+                if 参数.get("排版模式", "统一尺寸") == "混合尺寸":
+                    # 混合尺寸的位置已由装箱确定，加载失败的图片留空
+                    images = cells
+                    元素 = self.混合画布元素(images, 页面内容[index], 参数)
+                else:
+                    # 加载失败的图片不占位置
+                    images = [cell for cell in cells if cell is not None]
+                    
+                    # 判断是否是最后一页且图片不足一页
+                    is_last_page = (page == 布局参数["总页数"] - 1)
+                    is_full_page = len(images) == 布局参数["每页数量"]
+                    
+                    元素 = self.画布元素(images, 布局参数, 参数, is_last_page and not is_full_page)
+                
+                page_name = self.页面文件名(参数, start_num, page)
+                if 分带行数 > 0:
+                    preview = self.分带写出(元素, 参数, page, page_name, 文档, 写出线程, 分带行数)
+                else:
+                    canvas = self.绘制元素(元素, 参数)
+                    if 文档 is not None:
+                        写出线程.submit(page_name, 文档, canvas, 参数)
+                    else:
+                        写出线程.submit(page_name, canvas, os.path.join(参数["输出文件夹路径"], page_name), 参数)
+                    
+                    # 预览图在画布释放前生成，整页原图不会在内存中积压
+                    preview = self.生成预览(canvas, 参数, page)
+                    del canvas
+                if preview is not None:
+                    预览图.append(preview)
+                
+                del cells, images, 元素
+        finally:
+            # 中途出错时取消尚未开始的预读任务，已合成的页面仍会写完
+            for pending in 预读队列:
+                pending.cancel()
+            保存错误 = 写出线程.close()
+            if 文档 is not None:
+                try:
+                    文档.close()
+                except Exception as e:
+                    保存错误.append((os.path.basename(文档.path), e))
+
+        # 分带写出时同一页的多个条带可能报同样的错误，每页只保留第一条
+        错误 = {}
+        for name, e in 保存错误:
+            错误.setdefault(name, str(e))
+        return 预览图, list(错误.items())
+
+    def 执行写出(self, func, *args):
+        func(*args)
+
+    def 分带写出(self, 元素, params, page, page_name, 文档, 写出线程, 分带行数):
+        # 逐条带合成并交给写出线程，返回本页预览图（分带时不生成整页图，预览总是缩小到 预览最长边）
+        width, height = params["画布宽度_px"], params["画布高度_px"]
+        mode = "RGBA" if params["保存格式"] == "PNG" else "RGB"
+        writer = 文档 if 文档 is not None else StripPNGWriter(
+            os.path.join(params["输出文件夹路径"], page_name), params["分辨率"]
+        )
+        写出线程.submit(page_name, writer.begin_page, width, height, mode)
+
+        preview = None
+        if self.需要预览(params, page):
+            scale = min(1.0, max(1, params.get("预览最长边", 1024)) / max(width, height))
+            preview_w, preview_h = max(1, round(width * scale)), max(1, round(height * scale))
+            preview = Image.new("RGB", (preview_w, preview_h))
+        for top in range(0, height, 分带行数):
+            band_h = min(分带行数, height - top)
+            band = self.绘制元素(元素, params, top, band_h)
+            if mode == "RGB":
+                band = self.平铺背景(band, params)
+            写出线程.submit(page_name, writer.write_rows, band)
+            if preview is not None:
+                y0 = round(top * scale)
+                y1 = preview_h if top + band_h == height else round((top + band_h) * scale)
+                if y1 > y0:
+                    preview.paste(band.resize((preview_w, y1 - y0), Image.Resampling.LANCZOS).convert("RGB"), (0, y0))
+            del band
+        写出线程.submit(page_name, writer.end_page)
+        if 文档 is None:
+            # 单页 PNG 写出中途出错时关闭文件
+            写出线程.submit(page_name, writer.close)
+        return preview
+
+    def 多进程渲染(self, raw_params, 布局参数, 页面内容, pages, start_num, 进程数):
+        # pages 按顺序分成连续的几段分给各子进程，起始编号和布局参数在父进程算好后传入，各进程的文件名不会冲突；
+        # 父进程只汇总保存错误，并按页码读取子进程写出的预览图
+        分段 = [
+            (len(pages) * i // 进程数, len(pages) * (i + 1) // 进程数) for i in range(进程数)
+        ]
+        with tempfile.TemporaryDirectory(prefix="goohai_layout_") as tmp_dir:
+            calls = []
+            for start, stop in 分段:
+                calls.append((
+                    raw_params,
+                    布局参数,
+                    页面内容[start:stop],
+                    pages[start:stop],
+                    start_num,
+                    tmp_dir,
+                ))
+            results = run_in_processes(
+                __file__, "GH_BatchLayout", "子进程渲染", calls,
+                threads_per_process=max(1, (os.cpu_count() or 1) // 进程数),
             )
-            self.保存画布(canvas, output_path, 参数)
-            
-            # 只保存第一张排版图像
-            if page == 0:
-                first_canvas = canvas
-                result_tensors.append(self.转换到Tensor(canvas))
-            
-            del images, canvas
 
-        # 如果没有任何排版图像，返回空张量
-        if first_canvas is None:
-            return (torch.zeros(0), report)
-        
-        return (torch.stack(result_tensors), report)
+            保存错误 = []
+            for (start, stop), (ok, result) in zip(分段, results):
+                if ok:
+                    保存错误.extend(tuple(item) for item in result)
+                else:
+                    # 子进程出错时无法确定哪些版面已写出，整段按保存失败处理
+                    print(f"【孤海工具箱】排版子进程出错（第{pages[start] + 1}-{pages[stop - 1] + 1}页）:\n{result}")
+                    message = result.strip().splitlines()[-1]
+                    保存错误.extend((self.页面文件名(raw_params, start_num, page), message) for page in pages[start:stop])
+            预览图 = []
+            for page in pages:
+                预览路径 = os.path.join(tmp_dir, f"preview_{page}.npy")
+                if os.path.exists(预览路径):
+                    预览图.append(np.load(预览路径))
+        return 预览图, 保存错误
+
+    def 子进程渲染(self, raw_params, 布局参数, 页面内容, pages, start_num, preview_dir):
+        # 在子进程中执行：页面内容 只包含本段页面，页码仍按全局编号计算；
+        # 预览图以 uint8 数组写入 preview_dir，文件名带页码
+        参数 = self.预处理参数(raw_params)
+        预览图, 保存错误 = self.渲染页面(参数, 布局参数, 页面内容, pages, start_num)
+        preview_pages = [page for page in pages if self.需要预览(参数, page)]
+        for page, preview in zip(preview_pages, 预览图):
+            np.save(os.path.join(preview_dir, f"preview_{page}.npy"), np.asarray(preview))
+        return 保存错误
 
     # ================ 核心方法 ================
     def 预处理参数(self, raw_params):
@@ -146,9 +496,12 @@ class GH_BatchLayout:
    
         if not os.path.isdir(params["输入文件夹路径"]):
             raise NotADirectoryError(f"输入路径不存在: {params['输入文件夹路径']}")
-        os.makedirs(params["输出文件夹路径"], exist_ok=True)
+        if not params.get("仅规划", False):
+            os.makedirs(params["输出文件夹路径"], exist_ok=True)
         
         params["font"] = self.加载字体(params["字体选择"], params["字体大小"])
+        # 本次任务共用的圆角遮罩、描边图层
+        params["精灵缓存"] = {}
         
         params["stroke_color"] = self.解析颜色(params["描边颜色"])
         params["text_color"] = self.解析颜色(params["字体颜色"])
@@ -163,17 +516,13 @@ class GH_BatchLayout:
 
     def 加载字体(self, font_choice, font_size):
         if font_choice != "默认":
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(current_dir)
-            font_path = os.path.join(parent_dir, "fonts", font_choice)
             try:
-                return ImageFont.truetype(font_path, font_size)
+                return get_font(font_choice, font_size)
             except Exception as e:
                 print(f"字体加载失败: {str(e)}")
         
         try:
-            font = ImageFont.load_default()
-            return font.font_variant(size=font_size)
+            return get_default_font(font_size)
         except:
             raise RuntimeError("无法加载系统默认字体")
 
@@ -205,18 +554,74 @@ class GH_BatchLayout:
         }
         valid_exts = 格式映射.get(format_filter, 格式映射["所有图片"])
         
-        file_list = []
+        # 目录索引只重新读取 mtime 变化过的目录，结果按路径排序，排版顺序稳定
         if include_subfolders:
-            for root, _, files in os.walk(input_dir):
-                for f in files:
-                    if f.lower().endswith(valid_exts):
-                        rel_path = os.path.relpath(os.path.join(root, f), input_dir)
-                        file_list.append((rel_path, os.path.join(root, f)))
-        else:
-            for f in os.listdir(input_dir):
-                if f.lower().endswith(valid_exts):
-                    file_list.append((f, os.path.join(input_dir, f)))
-        return file_list
+            return [(os.path.relpath(p, input_dir), p) for p in walk_files(input_dir, True, valid_exts)]
+        if not os.path.isdir(input_dir):
+            raise FileNotFoundError(f"输入文件夹不存在: {input_dir}")
+        return [(os.path.basename(p), p) for p in walk_files(input_dir, False, valid_exts)]
+
+    def 页面文件名(self, params, start_num, page):
+        # 多页文档格式整个任务写入一个文件，页面记为 "文件名#页码"
+        base_name = params["输出文件名"].strip() or "孤海排版"
+        if params["保存格式"] in DOCUMENT_FORMATS:
+            return f"{base_name}_{start_num:02d}.{params['保存格式'].lower()}#{page + 1}"
+        return f"{base_name}_{start_num + page:02d}.{params['保存格式'].lower()}"
+
+    # ================ 排版清单 ================
+    def 清单路径(self, params, 页码段=None):
+        # 按方案分段渲染时每个页码段写自己的分段清单，多个实例同时渲染不会互相覆盖
+        if 页码段:
+            return os.path.join(params["输出文件夹路径"], f"{params['输出文件名']}_清单_{页码段}.json")
+        return os.path.join(params["输出文件夹路径"], f"{params['输出文件名']}_清单.json")
+
+    def 读取全部清单(self, params):
+        # 主清单和各分段清单合并（续排时用）；分段清单中的记录覆盖主清单中同一图片的旧记录
+        清单 = self.读取清单(self.清单路径(params))
+        prefix = f"{params['输出文件名']}_清单_"
+        try:
+            names = sorted(
+                name for name in os.listdir(params["输出文件夹路径"])
+                if name.startswith(prefix) and name.endswith(".json")
+            )
+        except OSError:
+            names = []
+        for name in names:
+            清单.update(self.读取清单(os.path.join(params["输出文件夹路径"], name)))
+        return 清单
+
+    def 读取清单(self, path):
+        # 返回 {输入图片绝对路径: {"size", "mtime_ns", "page"}}，清单不存在或损坏时返回空清单
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return dict(json.load(f).get("files", {}))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"排版清单读取失败，将视为全部未排版: {path} - {str(e)}")
+            return {}
+
+    def 写入清单(self, path, entries):
+        # 先写临时文件再替换，中途中断不会留下损坏的清单
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    def 文件签名(self, file_list):
+        # {输入图片绝对路径: (字节数, mtime_ns)}；逐个 stat 而不用目录索引的缓存，原地覆盖的图片也能发现
+        签名 = {}
+        for _, abs_path in file_list:
+            try:
+                st = os.stat(abs_path)
+            except OSError:
+                continue
+            签名[os.path.abspath(abs_path)] = (st.st_size, st.st_mtime_ns)
+        return 签名
+
+    def 已排版(self, entry, stat):
+        # 清单中有记录且文件大小、修改时间都未变化
+        return entry is not None and stat is not None and (entry.get("size"), entry.get("mtime_ns")) == tuple(stat)
 
     def 获取起始编号(self, output_dir, base_name, save_format):
         existing_files = [f for f in os.listdir(output_dir) 
@@ -267,24 +672,258 @@ class GH_BatchLayout:
         except:
             return int(font.size * 1.2) + 5
 
+    def 计算混合布局(self, params, file_list):
+        # 混合尺寸：每张图片确定各自尺寸后用 MaxRects 装箱，返回 (布局参数, 页面内容, 报告说明)
+        # 间距加到每个单元格的右侧和下方，画布可用区域同样加上一个间距，装箱结果即满足间距要求
+        if params["显示文件名"] in ["仅显示文件名", "文件名+扩展", "路径+文件名", "路径+文件名+扩展"]:
+            text_height = self.计算文本高度(params["font"])
+        else:
+            text_height = 0
+        gap_x, gap_y = params["水平间距_px"], params["垂直间距_px"]
+        area_w, area_h = params["可用宽度_px"], params["可用高度_px"]
+
+        规则 = parse_size_rules(params.get("尺寸规则", ""))
+        尺寸清单 = self.读取尺寸清单(params["输入文件夹路径"])
+        sizes, options = [], []
+        for rel_path, _ in file_list:
+            w, h = self.识别尺寸(rel_path, 规则, 尺寸清单, params)
+            sizes.append((w, h))
+            # 开启自适应旋转时单元格可以横竖互换（文件名仍在照片下方）
+            candidates = [(w + gap_x, h + text_height + gap_y)]
+            if params["自适应旋转"] and w != h:
+                candidates.append((h + gap_x, w + text_height + gap_y))
+            options.append(candidates)
+
+        sheets, unplaced = pack_rects(options, area_w + gap_x, area_h + gap_y)
+        if not params["开启批处理"]:
+            sheets = sheets[:1]
+
+        页面内容, 利用率 = [], []
+        for sheet in sheets:
+            # 内容整体在安全边距内居中
+            content_w = max(x + w for _, x, _, w, _, _ in sheet) - gap_x
+            content_h = max(y + h for _, _, y, _, h, _ in sheet) - gap_y
+            offset_x = params["安全边距_px"] + max(0, (area_w - content_w) // 2)
+            offset_y = params["安全边距_px"] + max(0, (area_h - content_h) // 2)
+            items, used = [], 0
+            # 按从上到下、从左到右的阅读顺序排列
+            for index, x, y, _, _, option in sorted(sheet, key=lambda p: (p[2], p[1])):
+                w, h = sizes[index] if option == 0 else sizes[index][::-1]
+                rel_path, abs_path = file_list[index]
+                items.append((rel_path, abs_path, offset_x + x, offset_y + y, w, h))
+                used += w * h
+            页面内容.append(items)
+            利用率.append(used / max(1, area_w * area_h))
+
+        布局参数 = {
+            "每页数量": max((len(items) for items in 页面内容), default=0),
+            "总页数": len(页面内容),
+            "text_height": text_height,
+            "未排版": [file_list[index][0] for index in unplaced],
+        }
+        说明 = ""
+        if 利用率:
+            说明 += f"\n混合尺寸装箱，平均利用率{sum(利用率) / len(利用率):.1%}"
+            说明 += "（各版：" + "、".join(f"{rate:.0%}" for rate in 利用率) + "）。"
+        if unplaced:
+            说明 += f"\n有{len(unplaced)}张图片尺寸超过画布可用区域，未排版："
+            说明 += "".join(f"\n{file_list[index][0]}" for index in unplaced)
+        return 布局参数, 页面内容, 说明
+
+    def 排版方案(self, params, 布局参数, 页面内容, start_num):
+        # 排版方案 JSON：每个版面的输出文件名、单元格位置（像素，相对整张画布）、图片和文字，以及面积利用率
+        # 只用布局计算的结果，不打开图片；统一尺寸按全部图片都能加载计算（实际渲染时加载失败的图片不占位置）
+        mixed = params.get("排版模式", "统一尺寸") == "混合尺寸"
+        area = max(1, params["可用宽度_px"] * params["可用高度_px"])
+        pages, used_total = [], 0
+        for page, items in enumerate(页面内容):
+            if mixed:
+                rects = [item[2:6] for item in items]
+            else:
+                is_incomplete = page == 布局参数["总页数"] - 1 and len(items) < 布局参数["每页数量"]
+                positions = self.单元格位置(len(items), 布局参数, params, is_incomplete)
+                rects = [(x, y, params["照片宽度_px"], params["照片高度_px"]) for x, y in positions]
+            cells, used = [], 0
+            for item, (x, y, w, h) in zip(items, rects):
+                text, _, _ = self.准备文件名(item[0], params["显示文件名"], x, y, w, h, params["font"])
+                cells.append({"x": x, "y": y, "w": w, "h": h, "file": item[0], "label": text})
+                used += w * h
+            first_image_name = items[0][0] if items else None
+            pages.append({
+                "page": page + 1,
+                "output": self.页面文件名(params, start_num, page),
+                "cells": cells,
+                "labels": [element[3] for element in self.底部文字元素(params, first_image_name)],
+                "utilization": round(used / area, 4),
+            })
+            used_total += used
+        方案 = {
+            "node": "GH_BatchLayout",
+            "canvas": {
+                "width": params["画布宽度_px"],
+                "height": params["画布高度_px"],
+                "dpi": params["分辨率"],
+                "margin": params["安全边距_px"],
+            },
+            "pages": pages,
+            "utilization": round(used_total / (area * len(pages)), 4) if pages else 0,
+            "unplaced": 布局参数.get("未排版", []),
+            # 以下为按方案渲染所需：输出编号在规划时确定，各页码段按同一编号渲染
+            "mode": params.get("排版模式", "统一尺寸"),
+            "format": params["保存格式"],
+            "output_name": params["输出文件名"],
+            "first_number": start_num,
+            "layout": {key: value for key, value in 布局参数.items() if key != "未排版"},
+        }
+        return json.dumps(方案, ensure_ascii=False)
+
+    def 读取尺寸清单(self, input_dir):
+        # 输入文件夹中的 尺寸清单.txt：每行 "文件名,尺寸"，尺寸为尺寸规则中的尺寸名或 "宽x高"（厘米），# 开头为注释
+        # 文件名可以是相对输入文件夹的路径或单纯的文件名，返回 {规范化的文件名: 尺寸文本}
+        path = os.path.join(input_dir, "尺寸清单.txt")
+        清单 = {}
+        try:
+            with open(path, "r", encoding="utf-8-sig") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return 清单
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"尺寸清单读取失败: {path} - {str(e)}")
+            return 清单
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            # 以最后一个分隔符分开，文件名本身可以包含逗号
+            match = re.match(r"^(.*)[,，=\t]\s*(.+?)$", line)
+            if match and match.group(1).strip():
+                清单[self.规范文件名(match.group(1).strip())] = match.group(2)
+        return 清单
+
+    def 规范文件名(self, name):
+        return os.path.normcase(os.path.normpath(name.replace("\\", "/")))
+
+    def 规则尺寸(self, rule):
+        if rule is None:
+            return None
+        try:
+            return float(rule[1]), float(rule[2])
+        except ValueError:
+            return None
+
+    def 识别尺寸(self, rel_path, 规则, 尺寸清单, params):
+        # 单张图片的单元格像素尺寸：尺寸清单优先，其次按文件名匹配尺寸规则，都没有时使用 照片宽度/照片高度
+        dpi = params["分辨率"]
+        value = 尺寸清单.get(self.规范文件名(rel_path))
+        if value is None:
+            value = 尺寸清单.get(self.规范文件名(os.path.basename(rel_path)))
+        if value is not None:
+            size = parse_size(value)
+            if size is None:
+                size = self.规则尺寸(next((r for r in 规则 if r[0] == value), None))
+            if size is None:
+                print(f"尺寸清单中的尺寸无法识别: {rel_path} - {value}")
+        else:
+            # 相对路径参与匹配，按尺寸分子文件夹存放（如 2寸/xxx.jpg）也能识别
+            size = self.规则尺寸(match_size_rule(rel_path, 规则))
+        if size is None:
+            return params["照片宽度_px"], params["照片高度_px"]
+        return (
+            max(1, convert_unit(size[0], "厘米", dpi)),
+            max(1, convert_unit(size[1], "厘米", dpi)),
+        )
+
     # ================ 图像处理 ================
-    def 加载当前页图片(self, file_paths):
-        images = []
-        for rel_path, abs_path in file_paths:
-            try:
+    def 提交页面(self, file_paths, params):
+        # 整页的单元格任务一次性提交，返回可稍后取结果的句柄
+        return submit_ordered(lambda item: self.准备单元格(item, params), file_paths)
+
+    def 准备单元格(self, file_item, params):
+        # 在工作线程中完成单张图片的解码和处理，返回 (文件名, 处理后的图片)
+        # 加载失败返回 None（该图不占位置），处理失败时图片为 None（该格留空）
+        # file_item 为 (相对路径, 绝对路径)，混合尺寸时另带 (x, y, 宽, 高)
+        rel_path, abs_path = file_item[0], file_item[1]
+        if len(file_item) >= 6:
+            target_w, target_h = file_item[4], file_item[5]
+        else:
+            target_w, target_h = params["照片宽度_px"], params["照片高度_px"]
+
+        # 单元格缓存：同样的照片和处理参数直接使用上次处理好的单元格
+        缓存模式 = params.get("单元格缓存", "内存")
+        use_disk = 缓存模式 == "内存+磁盘"
+        key = None
+        if 缓存模式 != "关闭":
+            key = cell_key(
+                abs_path, target_w, target_h, params["裁剪模式"], params["自适应旋转"],
+                tuple(params["bg_color"]), tuple(params["stroke_color"]), params["描边像素"],
+                params["圆角半径"], bool(params.get("快速解码", True)),
+            )
+            cached = get_cell(key, use_disk)
+            if cached is not None:
+                return rel_path, cached
+
+        try:
+            if params.get("快速解码", True):
+                img = open_reduced(
+                    abs_path, lambda size: self.单元格解码尺寸(size, target_w, target_h, params), 'RGBA'
+                )
+            else:
                 img = Image.open(abs_path).convert('RGBA')
-                images.append((rel_path, img))
-            except Exception as e:
-                print(f"图片加载失败: {abs_path} - {str(e)}")
-        return images
+        except Exception as e:
+            print(f"图片加载失败: {abs_path} - {str(e)}")
+            return None
+        try:
+            processed = self.处理单张图片(
+                img, 
+                target_w, 
+                target_h, 
+                params["裁剪模式"], 
+                params["自适应旋转"], 
+                params["bg_color"], 
+                params["stroke_color"], 
+                params["描边像素"],
+                params["圆角半径"],
+                params.get("精灵缓存"),
+            )
+        except Exception as e:
+            print(f"图片处理失败: {rel_path} - {str(e)}")
+            return rel_path, None
+        put_cell(key, processed, use_disk)
+        return rel_path, processed
 
-    def 生成画布(self, images, 布局参数, params, is_incomplete_page):
-        # 使用预处理后的背景颜色
-        canvas = Image.new('RGBA', 
-                         (params["画布宽度_px"], params["画布高度_px"]), 
-                         params["bg_color"])
-        draw = ImageDraw.Draw(canvas)
+    def 画布元素(self, images, 布局参数, params, is_incomplete_page):
+        # 计算一页中各图片和文字的位置，返回按绘制顺序排列的元素列表（见 绘制元素）
+        元素 = []
         
+        # 初始化第一张图片的文件名（用于"路径名+第一张图像名"选项）
+        first_image_name = None
+        
+        # 处理每张图片下的文件名显示（images 中的图片已由 准备单元格 处理好）
+        positions = self.单元格位置(len(images), 布局参数, params, is_incomplete_page)
+        for idx, ((filename, processed_img), (x, y)) in enumerate(zip(images, positions)):
+            # 记录第一张图片的文件名（用于"路径名+第一张图像名"）
+            if idx == 0:
+                first_image_name = filename
+                
+            # "仅显示路径名"和"路径名+第一张图像名"时图片下不显示文本（准备文件名 返回 None）
+            text, text_x, text_y = self.准备文件名(
+                filename, params["显示文件名"], x, y, 
+                params["照片宽度_px"], params["照片高度_px"], 
+                params["font"]
+            )
+            
+            if processed_img is not None:
+                元素.append(("图片", processed_img, x, y))
+            if text:
+                元素.append(("文字", text_x, text_y, text))
+        
+        # 处理底部文本（"仅显示路径名"和"路径名+第一张图像名"）
+        元素.extend(self.底部文字元素(params, first_image_name))
+        
+        return 元素
+
+    def 单元格位置(self, count, 布局参数, params, is_incomplete_page):
+        # 统一尺寸一页中前 count 个单元格的左上角坐标，按行排列
         # 内容宽度和高度计算（基于安全边距内的可用空间）
         content_width = 布局参数["每行数量"] * (params["照片宽度_px"] + params["水平间距_px"]) - params["水平间距_px"]
         
@@ -295,7 +934,7 @@ class GH_BatchLayout:
         start_y_full = params["安全边距_px"] + max(0, (params["可用高度_px"] - content_height_full) // 2)
         
         # 计算当前页内容高度
-        num_rows = math.ceil(len(images) / 布局参数["每行数量"])
+        num_rows = math.ceil(count / 布局参数["每行数量"])
         content_height_current = num_rows * (params["照片高度_px"] + params["垂直间距_px"] + 布局参数["text_height"]) - params["垂直间距_px"]
         
         # 水平方向居中在安全边距内
@@ -308,48 +947,17 @@ class GH_BatchLayout:
             start_y = params["安全边距_px"] + max(0, (params["可用高度_px"] - content_height_current) // 2)
         
         x, y = start_x, start_y
-        
-        # 初始化第一张图片的文件名（用于"路径名+第一张图像名"选项）
-        first_image_name = None
-        
-        # 处理每张图片下的文件名显示
-        for idx, (filename, img) in enumerate(images):
-            # 记录第一张图片的文件名（用于"路径名+第一张图像名"）
-            if idx == 0:
-                first_image_name = filename
-                
-            # 仅当不是"仅显示路径名"时才在图片下显示文本
-            if params["显示文件名"] != "仅显示路径名" and params["显示文件名"] != "路径名+第一张图像名":
-                text, text_x, text_y = self.准备文件名(
-                    filename, params["显示文件名"], x, y, 
-                    params["照片宽度_px"], params["照片高度_px"], 
-                    params["font"]
-                )
-            else:
-                text, text_x, text_y = None, 0, 0
-            
-            processed_img = self.处理单张图片(
-                img, 
-                params["照片宽度_px"], 
-                params["照片高度_px"], 
-                params["裁剪模式"], 
-                params["自适应旋转"], 
-                params["bg_color"], 
-                params["stroke_color"], 
-                params["描边像素"],
-                params["圆角半径"]
-            )
-            
-            canvas.paste(processed_img, (x, y), processed_img)
-            if text:
-                draw.text((text_x, text_y), text, fill=params["text_color"], font=params["font"])
-            
+        positions = []
+        for idx in range(count):
+            positions.append((x, y))
             x += params["照片宽度_px"] + params["水平间距_px"]
             if (idx + 1) % 布局参数["每行数量"] == 0:
                 x = start_x
                 y += params["照片高度_px"] + params["垂直间距_px"] + 布局参数["text_height"]
-        
-        # 处理底部文本（"仅显示路径名"和"路径名+第一张图像名"）
+        return positions
+
+    def 底部文字元素(self, params, first_image_name):
+        # 画布底部的文件夹名（"仅显示路径名"和"路径名+第一张图像名"）
         if params["显示文件名"] in ["仅显示路径名", "路径名+第一张图像名"]:
             if params["显示文件名"] == "仅显示路径名":
                 # 获取输入文件夹的basename（最后一级目录名）
@@ -391,8 +999,54 @@ class GH_BatchLayout:
             text_y = params["画布高度_px"] - params["安全边距_px"] - self.计算文本高度(params["font"]) - 50
             
             # 绘制文件夹名
-            draw.text((text_x, text_y), text_content, fill=params["text_color"], font=params["font"])
-        
+            return [("文字", text_x, text_y, text_content)]
+        return []
+
+    def 混合画布元素(self, images, items, params):
+        # 混合尺寸：images 与 items 一一对应，按装箱得到的位置粘贴，文件名显示在各自照片下方
+        元素 = []
+        first_image_name = None
+        for cell, item in zip(images, items):
+            filename, _, x, y, w, h = item[:6]
+            if first_image_name is None:
+                first_image_name = filename
+            if cell is None:
+                continue
+            processed_img = cell[1]
+            if processed_img is not None:
+                元素.append(("图片", processed_img, x, y))
+            text, text_x, text_y = self.准备文件名(filename, params["显示文件名"], x, y, w, h, params["font"])
+            if text:
+                元素.append(("文字", text_x, text_y, text))
+        元素.extend(self.底部文字元素(params, first_image_name))
+        return 元素
+
+    def 绘制元素(self, 元素, params, top=0, height=None):
+        # 把元素绘制到画布上从 top 行开始、高 height 行的区域（默认整张画布），只绘制与该区域重叠的元素
+        # 元素为 ("图片", 图片, x, y) 或 ("文字", x, y, 文本)，坐标都相对整张画布
+        if height is None:
+            height = params["画布高度_px"]
+        bottom = top + height
+        # 使用预处理后的背景颜色
+        canvas = Image.new('RGBA', (params["画布宽度_px"], height), params["bg_color"])
+        draw = ImageDraw.Draw(canvas)
+        for item in 元素:
+            if item[0] == "图片":
+                _, img, x, y = item
+                if y < bottom and y + img.height > top:
+                    canvas.paste(img, (x, y - top), img)
+            else:
+                _, text_x, text_y, text = item
+                if text_x == int(text_x) and text_y == int(text_y):
+                    # 整数坐标的文字用缓存的文字遮罩粘贴，重复的文字（及分带时的各个条带）只光栅化一次
+                    mask, (left, text_top) = text_mask(params["font"], text)
+                    y = int(text_y) + text_top
+                    if y < bottom and y + mask.height > top:
+                        canvas.paste(params["text_color"], (int(text_x) + left, y - top), mask)
+                else:
+                    _, text_top, _, text_bottom = params["font"].getbbox(text)
+                    if text_y + text_top < bottom and text_y + text_bottom > top:
+                        draw.text((text_x, text_y - top), text, fill=params["text_color"], font=params["font"])
         return canvas
 
     def 准备文件名(self, filename, show_mode, x, y, img_w, img_h, font):
@@ -417,11 +1071,12 @@ class GH_BatchLayout:
         max_width = img_w
         ellipsis = "…"
     
-        # 如果原始文本不需要截断
-        if font.getlength(text) <= max_width:
-            return text, x + (img_w - font.getlength(text)) // 2, y + img_h + 2
+        # 如果原始文本不需要截断（整段宽度和单字符宽度都按字体缓存）
+        width = text_width(font, text)
+        if width <= max_width:
+            return text, x + (img_w - width) // 2, y + img_h + 2
     
-        ellipsis_width = font.getlength(ellipsis)
+        ellipsis_width = char_width(font, ellipsis)
         available_width = max_width - ellipsis_width
     
         # 初始化候选文本为省略号（极端情况处理）
@@ -435,43 +1090,67 @@ class GH_BatchLayout:
             front_part = ""
             current_front = 0
             for char in text:
-                char_width = font.getlength(char)
-                if current_front + char_width > front_max:
+                char_w = char_width(font, char)
+                if current_front + char_w > front_max:
                     break
                 front_part += char
-                current_front += char_width
+                current_front += char_w
 
             # 获取后部保留内容
             back_part = ""
             current_back = 0
             for char in reversed(text):
-                char_width = font.getlength(char)
-                if current_back + char_width > back_max:
+                char_w = char_width(font, char)
+                if current_back + char_w > back_max:
                     break
                 back_part = char + back_part
-                current_back += char_width
+                current_back += char_w
 
             candidate = front_part + ellipsis + back_part
 
-        # 最终宽度校验
-        while font.getlength(candidate) > max_width and len(candidate) > 1:
-            candidate = candidate[:-1]  # 强制截断直到宽度合适
+        # 最终宽度校验：超宽时二分查找宽度合适的最长前缀（至少保留 1 个字符），测得的宽度留作最终坐标计算
+        width = text_width(font, candidate)
+        if len(candidate) > 1 and width > max_width:
+            lo, hi = 1, len(candidate) - 1
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if font.getlength(candidate[:mid]) <= max_width:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            candidate = candidate[:lo]
+            width = text_width(font, candidate)
 
         # 最小保留逻辑（至少保留首尾各1字符）
         if len(candidate) < 4 and len(text) >= 2:
             new_candidate = text[0] + ellipsis + text[-1]
-            if font.getlength(new_candidate) <= max_width:
-                candidate = new_candidate
-            elif font.getlength(ellipsis) <= max_width:
-                candidate = ellipsis
+            new_width = font.getlength(new_candidate)
+            if new_width <= max_width:
+                candidate, width = new_candidate, new_width
+            elif ellipsis_width <= max_width:
+                candidate, width = ellipsis, ellipsis_width
             else:
-                candidate = ""
+                candidate, width = "", 0
 
         # 计算最终坐标
-        text_width = font.getlength(candidate)
-        return candidate, x + (img_w - text_width) // 2, y + img_h + 2
+        return candidate, x + (img_w - width) // 2, y + img_h + 2
 
-    def 处理单张图片(self, img, target_w, target_h, crop_mode, auto_rotate, bg_color, stroke_color, stroke_size, corner_radius):
+    def 单元格解码尺寸(self, size, target_w, target_h, params):
+        # 原图缩放进单元格前至少需要的尺寸（按原图方向，考虑自适应旋转）
+        w, h = size
+        if params["自适应旋转"]:
+            target_ratio = target_w / target_h
+            orig_ratio = w / h
+            if (target_ratio < 1 and orig_ratio > 1) or (target_ratio > 1 and orig_ratio < 1):
+                target_w, target_h = target_h, target_w
+        if params["裁剪模式"] == "裁剪":
+            scale = max(target_w / w, target_h / h)
+        else:
+            scale = min(target_w / w, target_h / h)
+        return w * scale, h * scale
+
+    def 处理单张图片(self, img, target_w, target_h, crop_mode, auto_rotate, bg_color, stroke_color, stroke_size, corner_radius, sprites=None):
+        # sprites 为同一任务共用的字典，缓存只与单元格尺寸、圆角、描边有关的遮罩和描边图层
         # 预处理图像
         if auto_rotate:
             target_ratio = target_w / target_h
@@ -484,81 +1163,118 @@ class GH_BatchLayout:
         else:
             processed = ImageOps.pad(img, (target_w, target_h), color=bg_color, centering=(0.5, 0.5))
         
-        # 优化圆角处理（4倍超采样）
+        # 圆角：alpha 乘以预先生成的圆角遮罩，舍入方式与 Image.composite 相同（(x + 128) / 255 取整）
         if corner_radius > 0:
-            mask = Image.new('L', (target_w*4, target_h*4), 0)
-            draw = ImageDraw.Draw(mask)
-            draw.rounded_rectangle(
-                [(0, 0), (target_w*4, target_h*4)],
-                radius=corner_radius*4,
-                fill=255
+            mask = self.单元格精灵(
+                sprites, ("圆角", target_w, target_h, corner_radius),
+                lambda: self.圆角遮罩(target_w, target_h, corner_radius),
             )
-            mask = mask.resize((target_w, target_h), Image.Resampling.LANCZOS)
-            alpha = processed.split()[-1]
-            alpha = Image.composite(alpha, Image.new('L', alpha.size, 0), mask)
-            processed.putalpha(alpha)
+            alpha = np.asarray(processed.getchannel("A"), dtype=np.uint32) * mask + 128
+            processed.putalpha(Image.fromarray(((alpha + (alpha >> 8)) >> 8).astype(np.uint8), "L"))
 
-        # 改进的描边处理逻辑
+        # 描边：预先生成的描边图层叠在图片下面
         if stroke_size > 0:
-            # 使用超采样绘制描边
-            scale = 4
-            scaled_size = stroke_size * scale
-            scaled_w = target_w * scale
-            scaled_h = target_h * scale
-            
-            # 创建描边层
-            stroke_layer = Image.new('RGBA', (scaled_w, scaled_h))
-            draw = ImageDraw.Draw(stroke_layer)
-        
-            # 绘制外部形状
-            if corner_radius > 0:
-                cr = corner_radius * scale
-                draw.rounded_rectangle(
-                    [(0, 0), (scaled_w, scaled_h)],
-                    radius=cr,
-                    fill=stroke_color
-                )
-                # 绘制内部形状（收缩描边像素）
-                inner_rect = (
-                    scaled_size, 
-                    scaled_size, 
-                    scaled_w - scaled_size, 
-                    scaled_h - scaled_size
-                )
-                inner_radius = max(0, cr - scaled_size)
-                draw.rounded_rectangle(
-                    inner_rect,
-                    radius=inner_radius,
-                    fill=(0,0,0,0)  # 透明填充
-                )
-            else:
-                draw.rectangle(
-                    [(0, 0), (scaled_w, scaled_h)],
-                    fill=stroke_color
-                )
-                # 绘制内部矩形
-                draw.rectangle(
-                    [
-                        (scaled_size, scaled_size),
-                        (scaled_w - scaled_size, scaled_h - scaled_size)
-                    ],
-                    fill=(0,0,0,0)
-                )
-            
-            # 缩小描边层并应用抗锯齿
-            stroke_layer = stroke_layer.resize((target_w, target_h), Image.Resampling.LANCZOS)
-            
-            # 合并描边层和图像
+            stroke_layer = self.单元格精灵(
+                sprites, ("描边", target_w, target_h, corner_radius, stroke_size, tuple(stroke_color)),
+                lambda: self.描边图层(target_w, target_h, corner_radius, stroke_size, stroke_color),
+            )
             processed = Image.alpha_composite(stroke_layer, processed)
 
         return processed
 
+    def 单元格精灵(self, sprites, key, factory):
+        # 多个工作线程可能同时生成同一个精灵，结果相同，只是多算一次
+        if sprites is None:
+            return factory()
+        sprite = sprites.get(key)
+        if sprite is None:
+            sprite = factory()
+            sprites[key] = sprite
+        return sprite
+
+    def 圆角遮罩(self, target_w, target_h, corner_radius):
+        # 优化圆角处理（4倍超采样），返回 uint8 数组
+        mask = Image.new('L', (target_w*4, target_h*4), 0)
+        draw = ImageDraw.Draw(mask)
+        draw.rounded_rectangle(
+            [(0, 0), (target_w*4, target_h*4)],
+            radius=corner_radius*4,
+            fill=255
+        )
+        mask = mask.resize((target_w, target_h), Image.Resampling.LANCZOS)
+        return np.asarray(mask, dtype=np.uint32)
+
+    def 描边图层(self, target_w, target_h, corner_radius, stroke_size, stroke_color):
+        # 改进的描边处理逻辑（4倍超采样后缩小）
+        # 使用超采样绘制描边
+        scale = 4
+        scaled_size = stroke_size * scale
+        scaled_w = target_w * scale
+        scaled_h = target_h * scale
+
+        # 创建描边层
+        stroke_layer = Image.new('RGBA', (scaled_w, scaled_h))
+        draw = ImageDraw.Draw(stroke_layer)
+
+        # 绘制外部形状
+        if corner_radius > 0:
+            cr = corner_radius * scale
+            draw.rounded_rectangle(
+                [(0, 0), (scaled_w, scaled_h)],
+                radius=cr,
+                fill=stroke_color
+            )
+            # 绘制内部形状（收缩描边像素）
+            inner_rect = (
+                scaled_size, 
+                scaled_size, 
+                scaled_w - scaled_size, 
+                scaled_h - scaled_size
+            )
+            inner_radius = max(0, cr - scaled_size)
+            draw.rounded_rectangle(
+                inner_rect,
+                radius=inner_radius,
+                fill=(0,0,0,0)  # 透明填充
+            )
+        else:
+            draw.rectangle(
+                [(0, 0), (scaled_w, scaled_h)],
+                fill=stroke_color
+            )
+            # 绘制内部矩形
+            draw.rectangle(
+                [
+                    (scaled_size, scaled_size),
+                    (scaled_w - scaled_size, scaled_h - scaled_size)
+                ],
+                fill=(0,0,0,0)
+            )
+
+        # 缩小描边层并应用抗锯齿
+        stroke_layer = stroke_layer.resize((target_w, target_h), Image.Resampling.LANCZOS)
+        return stroke_layer
+
     # ================ 输出方法 ================
+    def 平铺背景(self, canvas, params):
+        # 转换为RGB并填充背景色
+        rgb_canvas = Image.new("RGB", canvas.size, params["bg_color"][:3])
+        rgb_canvas.paste(canvas, mask=canvas.split()[-1])
+        return rgb_canvas
+
+    def 打开文档(self, params, start_num):
+        path = os.path.join(params["输出文件夹路径"], self.页面文件名(params, start_num, 0).split("#")[0])
+        if params["保存格式"] == "PDF":
+            # PDF 中的页面以 JPEG 编码，质量与 JPG 格式一致
+            return PageDocumentWriter(path, "PDF", params["分辨率"], quality=100, subsampling=0)
+        return PageDocumentWriter(path, "TIFF", params["分辨率"], compression="tiff_lzw")
+
+    def 写入文档页(self, document, canvas, params):
+        document.add_page(self.平铺背景(canvas, params))
+
     def 保存画布(self, canvas, output_path, params):
         if params["保存格式"] == "JPG":
-            # 转换为RGB并填充背景色
-            rgb_canvas = Image.new("RGB", canvas.size, params["bg_color"][:3])
-            rgb_canvas.paste(canvas, mask=canvas.split()[-1])
+            rgb_canvas = self.平铺背景(canvas, params)
             rgb_canvas.save(
                 output_path,
                 format="JPEG",
@@ -574,10 +1290,22 @@ class GH_BatchLayout:
                 dpi=(params["分辨率"], params["分辨率"])
             )
 
-    def 转换到Tensor(self, canvas):
-        return torch.from_numpy(
-            np.array(canvas.convert("RGB")).astype(np.float32) / 255.0
-        )
+    def 需要预览(self, params, page):
+        # 按方案只渲染部分页时，"第一页"指本次渲染的第一页
+        return params.get("预览输出", "第一页") == "全部页缩略图" or page == params.get("预览页码", 0)
+
+    def 生成预览(self, canvas, params, page):
+        # 第一页模式返回原尺寸 RGB 图；缩略图模式先缩小再转换，不产生整页大小的副本
+        if not self.需要预览(params, page):
+            return None
+        if params.get("预览输出", "第一页") != "全部页缩略图":
+            return canvas.convert("RGB")
+        max_edge = max(1, params.get("预览最长边", 1024))
+        scale = min(1.0, max_edge / max(canvas.size))
+        size = (max(1, round(canvas.width * scale)), max(1, round(canvas.height * scale)))
+        if size != canvas.size:
+            canvas = canvas.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        return canvas.convert("RGB")
 
 NODE_CLASS_MAPPINGS = {"GH_BatchLayout": GH_BatchLayout}
 NODE_DISPLAY_NAME_MAPPINGS = {"GH_BatchLayout": "孤海批量自动排版"}
\ No newline at end of file
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
-# 孤海文件夹图片统计节点 - 随机种子刷新版
+# 孤海文件夹图片统计节点 - 按目录指纹刷新
 import os
-import random
+from goohai_utils.dir_index import list_files, file_index, tree_fingerprint
 
 IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tiff','.tif', '.gif'}
 
@@ -15,31 +15,35 @@ class LoneSeaImageCounter:
                      "label_on": "包含子文件夹",
                      "label_off": "包含子文件夹"
                }),
+            },
+            "optional": {
+                # 已不再需要：是否重新统计由 IS_CHANGED 的目录指纹决定，保留以兼容旧工作流
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
             },
         }
 
+    @classmethod
+    def IS_CHANGED(cls, folder_path, include_subdirs, **kwargs):
+        # 目录内图片增删、改名时指纹变化，ComfyUI 才会重新执行
+        return tree_fingerprint(folder_path.strip(), include_subdirs, IMAGE_EXTS)
+
     RETURN_TYPES = ("INT",)
     RETURN_NAMES = ("图片数量",)
     FUNCTION = "count_images"
     CATEGORY = "孤海工具箱"
 
-    def count_images(self, folder_path, include_subdirs, seed):
-        # 随机种子不参与实际计算，仅用于触发刷新
-        # 实际统计逻辑开始
+    def count_images(self, folder_path, include_subdirs, seed=0):
         clean_path = folder_path.strip()
         if not clean_path:
             return (0,)
 
         try:
-            count = 0
+            # 目录索引只重新读取 mtime 变化过的目录
             if include_subdirs:
-                for root, _, files in os.walk(clean_path):
-                    count += sum(1 for f in files if os.path.splitext(f)[1].lower() in IMAGE_EXTS)
+                count = len(file_index(clean_path, True, IMAGE_EXTS))
             else:
-                with os.scandir(clean_path) as entries:
-                    count = sum(1 for entry in entries if entry.is_file() 
-                                and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTS)
+                count = sum(1 for f in list_files(clean_path)
+                            if os.path.splitext(f)[1].lower() in IMAGE_EXTS)
         except Exception as e:
             print(f"【孤海统计】路径错误: {str(e)}")
             return (0,)
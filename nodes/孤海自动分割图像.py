@@ -1,9 +1,9 @@
 import os
 import re
 import numpy as np
-from PIL import Image
-import torch
 import folder_paths
+from goohai_utils.tensor_convert import tensor_to_pil, pil_to_tensor
+from goohai_utils.batch_exec import batch_count, map_batch, stack_tensors
 
 def auto_crop_image(image):
     img = image.convert("RGB")
@@ -77,23 +77,6 @@ class GuHaiAutoImageSplit:
         if not 文件名前缀.strip():
             文件名前缀 = "孤海图像分割_"
         
-        # 转换张量为PIL图像
-        img_tensor = 图像[0].cpu().numpy()
-        img_array = np.clip(img_tensor * 255.0, 0, 255).astype(np.uint8)
-        img = Image.fromarray(img_array)
-        
-        # 根据开关处理图像
-        if 移除画布边缘:
-            processed_img = auto_crop_image(img)
-        else:
-            processed_img = img  # 直接使用原始图像
-        
-        img_width, img_height = processed_img.size
-        
-        # 计算分块尺寸
-        tile_width = img_width // 水平张数
-        tile_height = img_height // 垂直张数
-        
         # 创建保存目录
         full_path = os.path.join(folder_paths.get_output_directory(), 保存目录)
         os.makedirs(full_path, exist_ok=True)
@@ -118,9 +101,30 @@ class GuHaiAutoImageSplit:
                 if current_num > max_counter:
                     max_counter = current_num
         
+        # 批次中每张图像预留连续的编号段，按批次顺序编号，各张可以并行分割保存
+        tiles_per_image = 水平张数 * 垂直张数
+        
+        def split_one(index):
+            img = tensor_to_pil(图像, index)
+            processed_img = auto_crop_image(img) if 移除画布边缘 else img
+            return self.split_single(
+                processed_img, 水平张数, 垂直张数, 移除描边, full_path, 文件名前缀,
+                ext, save_format, save_args, max_counter + 1 + index * tiles_per_image,
+            )
+        
+        results = map_batch(split_one, batch_count(图像))
+        return (stack_tensors([tile for tiles in results for tile in tiles]),)
+
+    def split_single(self, processed_img, 水平张数, 垂直张数, 移除描边, full_path, 文件名前缀,
+                     ext, save_format, save_args, counter):
+        img_width, img_height = processed_img.size
+        
+        # 计算分块尺寸
+        tile_width = img_width // 水平张数
+        tile_height = img_height // 垂直张数
+        
         # 分割并保存图像
         output_images = []
-        counter = max_counter + 1
         for y in range(垂直张数):
             for x in range(水平张数):
                 # 计算原始分块位置
@@ -155,12 +159,10 @@ class GuHaiAutoImageSplit:
                 tile.save(save_path, **save_args)
                 
                 # 转换回张量格式
-                tile_np = np.array(tile).astype(np.float32) / 255.0
-                tile_tensor = torch.from_numpy(tile_np).unsqueeze(0)
-                output_images.append(tile_tensor)
+                output_images.append(pil_to_tensor(tile))
                 counter += 1
         
-        return (torch.cat(output_images, dim=0),)
+        return output_images
 
 # 节点注册
 NODE_CLASS_MAPPINGS = {